@@ -0,0 +1,201 @@
+import sys
+import asyncio
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class AsgiAdapter:
+    """Adaptador ASGI para a aplicação Flask
+
+    O recebimento do upload e o envio da resposta acontecem no event loop; só
+    depois que o corpo da requisição chega por completo a aplicação WSGI é
+    executada em um pool de threads limitado. Assim, clientes lentos não
+    ocupam uma thread durante o upload.
+
+    Rotas de análise e as demais (saúde, histórico, estatísticas) usam pools
+    separados, para que análises longas não atrasem verificações de saúde.
+    """
+
+    def __init__(self, wsgi_app, max_workers: Optional[int] = None,
+                 max_content_length: Optional[int] = None,
+                 spool_size: Optional[int] = None,
+                 light_workers: Optional[int] = None):
+        self.wsgi_app = wsgi_app
+        self.max_workers = max_workers or Config.ASGI_MAX_WORKERS
+        self.light_workers = light_workers or Config.ASGI_LIGHT_WORKERS
+        self.max_content_length = max_content_length or Config.MAX_CONTENT_LENGTH
+        self.spool_size = spool_size or Config.ASGI_SPOOL_SIZE
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+
+    def _get_executor(self, name: str, max_workers: int) -> ThreadPoolExecutor:
+        if name not in self._executors:
+            self._executors[name] = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix=f'asgi-{name}'
+            )
+        return self._executors[name]
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """Pool das rotas de análise"""
+        return self._get_executor('analysis', self.max_workers)
+
+    @property
+    def light_executor(self) -> ThreadPoolExecutor:
+        """Pool das demais rotas"""
+        return self._get_executor('light', self.light_workers)
+
+    @staticmethod
+    def is_analysis_request(scope) -> bool:
+        return scope['path'].startswith(Config.ASGI_ANALYSIS_PATHS)
+
+    def shutdown(self):
+        """Encerra os pools de threads"""
+        for executor in self._executors.values():
+            executor.shutdown(wait=True)
+        self._executors.clear()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise ValueError(f"Tipo de conexão não suportado: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                logger.info(f"🚀 Modo ASGI iniciado com até {self.max_workers} análises simultâneas")
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope, receive, send):
+        # Rejeita cedo uploads que declaram tamanho acima do limite
+        for name, value in scope.get('headers', []):
+            if name == b'content-length' and value.isdigit() and int(value) > self.max_content_length:
+                await self._reject_too_large(send)
+                return
+
+        # Corpo grande vai para disco a partir de spool_size bytes
+        body = tempfile.SpooledTemporaryFile(max_size=self.spool_size)
+        loop = asyncio.get_running_loop()
+        try:
+            received = 0
+            more_body = True
+            while more_body:
+                message = await receive()
+                if message['type'] == 'http.disconnect':
+                    return
+                chunk = message.get('body', b'')
+                received += len(chunk)
+                if received > self.max_content_length:
+                    await self._reject_too_large(send)
+                    return
+                if received > self.spool_size:
+                    # Já em disco (ou passando para o disco): a escrita sai do event loop
+                    await loop.run_in_executor(None, body.write, chunk)
+                else:
+                    body.write(chunk)
+                more_body = message.get('more_body', False)
+            body.seek(0)
+
+            environ = self._build_environ(scope, body, received)
+            executor = self.executor if self.is_analysis_request(scope) else self.light_executor
+            status, headers, chunks = await loop.run_in_executor(
+                executor, self._run_wsgi, environ
+            )
+            await self._send_response(send, status, headers, chunks)
+        finally:
+            body.close()
+
+    async def _reject_too_large(self, send):
+        logger.warning(f"Upload rejeitado: acima de {self.max_content_length} bytes")
+        await self._send_response(send, 413, [(b'content-type', b'application/json')],
+                                  [b'{"error": "Arquivo muito grande"}'])
+
+    @staticmethod
+    async def _send_response(send, status: int, headers: List[Tuple[bytes, bytes]], chunks: List[bytes]):
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        for chunk in chunks:
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    def _run_wsgi(self, environ: Dict) -> Tuple[int, List[Tuple[bytes, bytes]], List[bytes]]:
+        """Executa a aplicação WSGI (em uma thread do pool) e coleta a resposta"""
+        response = {}
+        chunks: List[bytes] = []
+
+        def start_response(status, response_headers, exc_info=None):
+            if exc_info and response:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in response_headers
+            ]
+            return chunks.append
+
+        iterable = self.wsgi_app(environ, start_response)
+        try:
+            for data in iterable:
+                if data:
+                    chunks.append(data)
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+
+        return response['status'], response['headers'], chunks
+
+    @staticmethod
+    def _build_environ(scope, body, content_length: int) -> Dict:
+        """Monta o environ WSGI (PEP 3333) a partir do scope ASGI"""
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        root_path = scope.get('root_path', '')
+        path = scope['path']
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+            'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'CONTENT_LENGTH': str(content_length),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin-1')
+            value = value.decode('latin-1')
+            if name == 'content-type':
+                environ['CONTENT_TYPE'] = value
+                continue
+            if name == 'content-length':
+                continue
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+
+        return environ
@@ -1,11 +1,14 @@
 from flask import Blueprint, request, jsonify, current_app
 import os
+import atexit
+import hashlib
 import logging
 from werkzeug.utils import secure_filename
 from datetime import datetime
 import uuid
 
 from ..services.deepfake_detector import DeepfakeDetector
+from ..services.history_store import HistoryStore
 from ..utils.config import Config
 
 logger = logging.getLogger(__name__)
@@ -14,13 +17,23 @@ detection_bp = Blueprint('detection', __name__)
 # Instância global do detector
 detector = DeepfakeDetector()
 
+# Histórico de análises (gravado em segundo plano)
+history = HistoryStore() if Config.HISTORY_ENABLED else None
+if history is not None:
+    # A thread de escrita é daemon: grava o lote pendente antes de o processo sair
+    atexit.register(history.close)
+
 def allowed_file(filename, file_type):
     """Verifica se o arquivo tem extensão permitida"""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS[file_type]
 
 def save_uploaded_file(file, file_type):
-    """Salva arquivo enviado e retorna o caminho"""
+    """Salva arquivo enviado e retorna o caminho e o hash SHA-256 do conteúdo
+
+    O hash é calculado sobre os blocos à medida que são gravados, sem reler
+    o arquivo depois.
+    """
     if file and allowed_file(file.filename, file_type):
         # Gerar nome único para o arquivo
         filename = secure_filename(file.filename)
@@ -32,12 +45,46 @@ def save_uploaded_file(file, file_type):
         
         # Salvar arquivo
         file_path = os.path.join(upload_path, unique_filename)
-        file.save(file_path)
+        digest = hashlib.sha256()
+        with open(file_path, 'wb') as f:
+            for chunk in iter(lambda: file.stream.read(1024 * 1024), b''):
+                digest.update(chunk)
+                f.write(chunk)
         
         logger.info(f"Arquivo salvo: {file_path}")
-        return file_path
+        return file_path, digest.hexdigest()
     
-    return None
+    return None, None
+
+def record_history(result, media_type, content_hash=None):
+    """Registra o resultado no histórico sem bloquear a requisição"""
+    if history is not None:
+        history.record(result, media_type, content_hash)
+
+def parse_timestamp(name):
+    """Lê uma data ISO 8601 da query string como timestamp (None quando ausente)"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    return datetime.fromisoformat(value).timestamp()
+
+def unknown_model_response():
+    """Resposta 404 quando ?model= não corresponde a uma versão selecionável em ml_models/"""
+    version = request.args.get('model')
+    versions = detector.registry.selectable_versions()
+    if version is None or version in versions:
+        return None
+    return jsonify({
+        "error": "Modelo não encontrado",
+        "message": f"Versões disponíveis: {', '.join(versions)}"
+    }), 404
+
+def flag_requested(name):
+    """Lê uma flag booleana da query string (None quando ausente)"""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    return value.lower() in ('1', 'true', 'yes')
 
 @detection_bp.route('/health', methods=['GET'])
 def health_check():
@@ -63,6 +110,11 @@ def health_check():
 def detect_image():
     """Analisa uma imagem para detectar deepfake"""
     try:
+        # Validar versão de modelo pedida antes de receber o arquivo
+        error_response = unknown_model_response()
+        if error_response:
+            return error_response
+        
         # Verificar se há arquivo no request
         if 'file' not in request.files:
             return jsonify({
@@ -80,7 +132,7 @@ def detect_image():
             }), 400
         
         # Salvar arquivo
-        file_path = save_uploaded_file(file, 'image')
+        file_path, content_hash = save_uploaded_file(file, 'image')
         if not file_path:
             return jsonify({
                 "error": "Tipo de arquivo não suportado",
@@ -89,16 +141,17 @@ def detect_image():
         
         # Analisar imagem
         logger.info(f"Iniciando análise de imagem: {file_path}")
-        result = detector.analyze_image(file_path)
+        result = detector.analyze_image(file_path, model_version=request.args.get('model'))
         
         # Adicionar informações do arquivo
         result['filename'] = file.filename
         result['file_size'] = os.path.getsize(file_path)
+        record_history(result, 'image', content_hash)
         
         # Limpar arquivo temporário (opcional)
         # os.remove(file_path)
         
-        logger.info(f"Análise concluída: {result}")
+        logger.info("Análise concluída: %s", result, extra={'sampled': True})
         return jsonify(result)
         
     except Exception as e:
@@ -112,6 +165,11 @@ def detect_image():
 def detect_video():
     """Analisa um vídeo para detectar deepfake"""
     try:
+        # Validar versão de modelo pedida antes de receber o arquivo
+        error_response = unknown_model_response()
+        if error_response:
+            return error_response
+        
         # Verificar se há arquivo no request
         if 'file' not in request.files:
             return jsonify({
@@ -129,7 +187,7 @@ def detect_video():
             }), 400
         
         # Salvar arquivo
-        file_path = save_uploaded_file(file, 'video')
+        file_path, content_hash = save_uploaded_file(file, 'video')
         if not file_path:
             return jsonify({
                 "error": "Tipo de arquivo não suportado",
@@ -138,16 +196,22 @@ def detect_video():
         
         # Analisar vídeo
         logger.info(f"Iniciando análise de vídeo: {file_path}")
-        result = detector.analyze_video(file_path)
+        result = detector.analyze_video(
+            file_path,
+            summary_only=flag_requested('summary'),
+            parallel=flag_requested('parallel'),
+            model_version=request.args.get('model')
+        )
         
         # Adicionar informações do arquivo
         result['filename'] = file.filename
         result['file_size'] = os.path.getsize(file_path)
+        record_history(result, 'video', content_hash)
         
         # Limpar arquivo temporário (opcional)
         # os.remove(file_path)
         
-        logger.info(f"Análise concluída: {result}")
+        logger.info("Análise concluída: %s", result, extra={'sampled': True})
         return jsonify(result)
         
     except Exception as e:
@@ -161,6 +225,11 @@ def detect_video():
 def batch_detection():
     """Analisa múltiplos arquivos em lote"""
     try:
+        # Validar versão de modelo pedida antes de receber os arquivos
+        error_response = unknown_model_response()
+        if error_response:
+            return error_response
+        
         # Verificar se há arquivos no request
         if 'files' not in request.files:
             return jsonify({
@@ -183,15 +252,20 @@ def batch_detection():
                 # Determinar tipo de arquivo
                 if allowed_file(file.filename, 'image'):
                     file_type = 'image'
-                    file_path = save_uploaded_file(file, 'image')
+                    file_path, content_hash = save_uploaded_file(file, 'image')
                     if file_path:
-                        result = detector.analyze_image(file_path)
+                        result = detector.analyze_image(file_path, model_version=request.args.get('model'))
                         result['type'] = 'image'
                 elif allowed_file(file.filename, 'video'):
                     file_type = 'video'
-                    file_path = save_uploaded_file(file, 'video')
+                    file_path, content_hash = save_uploaded_file(file, 'video')
                     if file_path:
-                        result = detector.analyze_video(file_path)
+                        result = detector.analyze_video(
+                            file_path,
+                            summary_only=flag_requested('summary'),
+                            parallel=flag_requested('parallel'),
+                            model_version=request.args.get('model')
+                        )
                         result['type'] = 'video'
                 else:
                     result = {
@@ -205,6 +279,7 @@ def batch_detection():
                 result['filename'] = file.filename
                 if file_path:
                     result['file_size'] = os.path.getsize(file_path)
+                    record_history(result, file_type, content_hash)
                 
                 results.append(result)
                 
@@ -248,6 +323,7 @@ def get_model_status():
     try:
         return jsonify({
             "model_loaded": detector.is_model_loaded(),
+            "model_version": detector.registry.default_version,
             "confidence_threshold": detector.confidence_threshold,
             "image_size": detector.image_size,
             "timestamp": datetime.now().isoformat()
@@ -259,20 +335,129 @@ def get_model_status():
             "message": str(e)
         }), 500
 
+@detection_bp.route('/models', methods=['GET'])
+def list_models():
+    """Lista as versões de modelo disponíveis e carregadas"""
+    try:
+        return jsonify(detector.registry.info())
+    except Exception as e:
+        logger.error(f"Erro ao listar modelos: {e}")
+        return jsonify({
+            "error": "Erro ao listar modelos",
+            "message": str(e)
+        }), 500
+
+@detection_bp.route('/models/<version>/activate', methods=['POST'])
+def activate_model(version):
+    """Carrega uma versão de modelo em segundo plano e a torna padrão"""
+    try:
+        detector.registry.activate_async(version)
+        return jsonify({
+            "message": "Troca de modelo iniciada",
+            "version": version,
+            "current_version": detector.registry.default_version,
+            "timestamp": datetime.now().isoformat()
+        }), 202
+    except ValueError as e:
+        return jsonify({
+            "error": "Modelo não encontrado",
+            "message": str(e)
+        }), 404
+    except Exception as e:
+        logger.error(f"Erro ao ativar modelo: {e}")
+        return jsonify({
+            "error": "Erro ao ativar modelo",
+            "message": str(e)
+        }), 500
+
+@detection_bp.route('/history', methods=['GET'])
+def get_history():
+    """Lista análises anteriores, mais recentes primeiro, com paginação por cursor"""
+    if history is None:
+        return jsonify({
+            "error": "Histórico desativado",
+            "message": "Defina HISTORY_ENABLED=true para registrar análises"
+        }), 404
+    try:
+        verdict = request.args.get('verdict')
+        if verdict not in (None, 'deepfake', 'authentic'):
+            raise ValueError("verdict deve ser 'deepfake' ou 'authentic'")
+
+        page = history.query(
+            limit=request.args.get('limit', 50, type=int),
+            cursor=request.args.get('cursor'),
+            media_type=request.args.get('media_type'),
+            is_deepfake=None if verdict is None else verdict == 'deepfake',
+            since=parse_timestamp('since'),
+            until=parse_timestamp('until'),
+            content_hash=request.args.get('content_hash')
+        )
+        page["timestamp"] = datetime.now().isoformat()
+        return jsonify(page)
+    except ValueError as e:
+        return jsonify({
+            "error": "Parâmetro inválido",
+            "message": str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Erro ao consultar histórico: {e}")
+        return jsonify({
+            "error": "Erro ao consultar histórico",
+            "message": str(e)
+        }), 500
+
+@detection_bp.route('/history/rollups', methods=['GET'])
+def get_history_rollups():
+    """Totais de análises por hora ou por dia, para gráficos do dashboard"""
+    if history is None:
+        return jsonify({
+            "error": "Histórico desativado",
+            "message": "Defina HISTORY_ENABLED=true para registrar análises"
+        }), 404
+    try:
+        bucket = request.args.get('bucket', 'hour')
+        return jsonify({
+            "bucket": bucket,
+            "rollups": history.rollups(
+                bucket=bucket,
+                since=parse_timestamp('since'),
+                until=parse_timestamp('until'),
+                media_type=request.args.get('media_type')
+            ),
+            "timestamp": datetime.now().isoformat()
+        })
+    except ValueError as e:
+        return jsonify({
+            "error": "Parâmetro inválido",
+            "message": str(e)
+        }), 400
+    except Exception as e:
+        logger.error(f"Erro ao consultar agregados do histórico: {e}")
+        return jsonify({
+            "error": "Erro ao consultar agregados do histórico",
+            "message": str(e)
+        }), 500
+
 @detection_bp.route('/stats', methods=['GET'])
 def get_detection_stats():
     """Retorna estatísticas de detecção"""
     try:
-        # Aqui você pode implementar estatísticas baseadas em histórico
-        # Por enquanto, retornamos informações básicas
-        return jsonify({
-            "total_analyses": 0,  # Implementar contador
-            "successful_analyses": 0,  # Implementar contador
-            "failed_analyses": 0,  # Implementar contador
-            "average_processing_time": 0.0,  # Implementar cálculo
+        stats = {
+            "total_analyses": 0,
+            "successful_analyses": 0,
+            "failed_analyses": 0,
+            "average_processing_time": 0.0
+        }
+        # Totais do histórico (lidos dos agregados por hora)
+        if history is not None:
+            stats.update(history.stats())
+        stats.update({
             "model_accuracy": 0.95,  # Valor de exemplo
+            "perceptual_cache": detector.perceptual_cache.stats() if detector.perceptual_cache else None,
+            "cascade": detector.get_cascade_stats(),
             "timestamp": datetime.now().isoformat()
         })
+        return jsonify(stats)
     except Exception as e:
         logger.error(f"Erro ao obter estatísticas: {e}")
         return jsonify({
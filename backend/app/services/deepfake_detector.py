@@ -5,11 +5,19 @@ import tensorflow as tf
 from tensorflow import keras
 from PIL import Image
 import logging
-from typing import Dict, List, Tuple, Optional
+import threading
+from typing import Dict, Iterator, List, Tuple, Optional
 import time
+from contextlib import contextmanager
 from datetime import datetime
 
 from ..utils.config import Config
+from ..utils.image_processing import decode_image, preprocess_frame
+from ..utils.threading_config import apply_thread_settings
+from .video_aggregator import StreamingVideoAggregator
+from .perceptual_cache import FrameDeduplicator, PerceptualCache, face_dhash, video_dhash
+from .model_registry import ModelRegistry
+from . import parallel_video
 
 logger = logging.getLogger(__name__)
 
@@ -17,15 +25,41 @@ class DeepfakeDetector:
     """Serviço principal para detecção de deepfakes"""
     
     def __init__(self):
-        self.model = None
-        self.model_loaded = False
+        # Pools de threads precisam ser definidos antes da primeira operação do TensorFlow
+        apply_thread_settings()
+        
+        self.registry = ModelRegistry()
         self.face_cascade = None
         self.image_size = Config.IMAGE_SIZE
         self.confidence_threshold = Config.CONFIDENCE_THRESHOLD
+        self.screener_version = None
+        self._cascade_lock = threading.Lock()
+        self._cascade_counts = {"screener": 0, "full": 0}
+        self.perceptual_cache = None
+        if Config.PERCEPTUAL_CACHE_ENABLED:
+            self.perceptual_cache = PerceptualCache(
+                max_distance=Config.PERCEPTUAL_HASH_MAX_DISTANCE,
+                max_entries=Config.PERCEPTUAL_CACHE_MAX_ENTRIES
+            )
         
         # Carregar modelo e recursos
         self._load_model()
+        if Config.CASCADE_ENABLED and self.model_loaded:
+            self._load_screener_model()
         self._load_face_cascade()
+        
+        # Trocas a quente também recarregam, em segundo plano, o pool de vídeo paralelo
+        self.registry.add_activate_listener(parallel_video.refresh_executor)
+    
+    @property
+    def model(self):
+        """Modelo padrão atualmente ativo no registro"""
+        handle = self.registry.get_handle()
+        return handle.model if handle is not None else None
+    
+    @property
+    def model_loaded(self) -> bool:
+        return self.registry.is_loaded()
     
     def _load_model(self):
         """Carrega o modelo de deep learning"""
@@ -33,9 +67,10 @@ class DeepfakeDetector:
             model_path = os.path.join(Config.MODEL_PATH, Config.DEFAULT_MODEL)
             
             if os.path.exists(model_path):
-                self.model = keras.models.load_model(model_path)
-                self.model_loaded = True
-                logger.info(f"✅ Modelo carregado: {model_path}")
+                self.registry.load(
+                    ModelRegistry.version_from_filename(Config.DEFAULT_MODEL),
+                    make_default=True
+                )
             else:
                 logger.warning(f"⚠️ Modelo não encontrado: {model_path}")
                 logger.info("🔧 Criando modelo padrão...")
@@ -67,19 +102,65 @@ class DeepfakeDetector:
                 metrics=['accuracy']
             )
             
-            self.model = model
-            self.model_loaded = True
-            
             # Salvar modelo
             model_path = os.path.join(Config.MODEL_PATH, Config.DEFAULT_MODEL)
             os.makedirs(Config.MODEL_PATH, exist_ok=True)
             model.save(model_path)
             
+            self.registry.register(
+                ModelRegistry.version_from_filename(Config.DEFAULT_MODEL),
+                model,
+                model_path,
+                make_default=True
+            )
+            
             logger.info("✅ Modelo padrão criado e salvo")
             
         except Exception as e:
             logger.error(f"❌ Erro ao criar modelo padrão: {e}")
-            self.model_loaded = False
+    
+    def _load_screener_model(self):
+        """Carrega o modelo de triagem usado no primeiro estágio da cascata"""
+        version = ModelRegistry.version_from_filename(Config.SCREENER_MODEL)
+        try:
+            model_path = os.path.join(Config.MODEL_PATH, Config.SCREENER_MODEL)
+            
+            if os.path.exists(model_path):
+                self.registry.load(version)
+            else:
+                logger.warning(f"⚠️ Modelo de triagem não encontrado: {model_path}")
+                logger.info("🔧 Criando modelo de triagem padrão...")
+                self._create_screener_model(model_path)
+            
+            self.screener_version = version
+            
+        except Exception as e:
+            logger.error(f"❌ Erro ao carregar modelo de triagem: {e}")
+            self.screener_version = None
+    
+    def _create_screener_model(self, model_path: str):
+        """Cria uma versão reduzida do modelo padrão, com entrada menor"""
+        model = keras.Sequential([
+            keras.layers.Conv2D(16, (3, 3), activation='relu', input_shape=(*Config.SCREENER_IMAGE_SIZE, 3)),
+            keras.layers.MaxPooling2D((2, 2)),
+            keras.layers.Conv2D(32, (3, 3), activation='relu'),
+            keras.layers.MaxPooling2D((2, 2)),
+            keras.layers.Flatten(),
+            keras.layers.Dense(32, activation='relu'),
+            keras.layers.Dense(1, activation='sigmoid')
+        ])
+        
+        model.compile(
+            optimizer='adam',
+            loss='binary_crossentropy',
+            metrics=['accuracy']
+        )
+        
+        os.makedirs(Config.MODEL_PATH, exist_ok=True)
+        model.save(model_path)
+        
+        self.registry.register(ModelRegistry.version_from_filename(Config.SCREENER_MODEL), model, model_path)
+        logger.info("✅ Modelo de triagem criado e salvo")
     
     def _load_face_cascade(self):
         """Carrega o classificador de faces do OpenCV"""
@@ -94,20 +175,100 @@ class DeepfakeDetector:
         """Verifica se o modelo está carregado"""
         return self.model_loaded and self.model is not None
     
-    def preprocess_image(self, image: np.ndarray) -> np.ndarray:
-        """Pré-processa uma imagem para análise"""
+    @contextmanager
+    def _acquire_model(self, model_version: Optional[str] = None):
+        """Reserva o modelo usado na requisição (None se nenhum estiver disponível)"""
+        if model_version is None and not self.registry.is_loaded():
+            yield None
+            return
+        with self.registry.acquire(model_version) as handle:
+            yield handle
+    
+    def _predict(self, processed_image: np.ndarray, handle) -> Tuple[float, bool]:
+        """Executa a inferência com o modelo reservado"""
+        return self._predict_batch(processed_image, handle)[0]
+    
+    def _predict_batch(self, processed_batch: np.ndarray, handle) -> List[Tuple[float, bool]]:
+        """Executa a inferência de um lote em uma única chamada ao modelo"""
+        if handle is not None and handle.model is not None:
+            predictions = handle.model.predict(processed_batch, verbose=0)
+            return [
+                (float(p[0]), float(p[0]) > self.confidence_threshold)
+                for p in predictions
+            ]
+        # Fallback para demonstração
+        return [(0.5, False)] * len(processed_batch)
+    
+    def _score(self, image: np.ndarray, handle) -> Tuple[float, bool, str]:
+        """Pontua uma imagem, passando pela triagem quando a cascata está ativa"""
+        return self._score_batch([image], handle)[0]
+    
+    def _score_batch(self, images: List[np.ndarray], handle) -> List[Tuple[float, bool, str]]:
+        """Pontua um lote de imagens, passando pela triagem quando a cascata está ativa
+        
+        O modelo completo só é executado para as imagens cujo score da triagem
+        cai dentro da faixa de incerteza em torno do limiar de confiança.
+        """
+        scores: List[Optional[Tuple[float, bool, str]]] = [None] * len(images)
+        escalated = list(range(len(images)))
+        
+        if self.screener_version is not None:
+            with self.registry.acquire(self.screener_version) as screener:
+                screened = np.concatenate([
+                    self.preprocess_image(image, Config.SCREENER_IMAGE_SIZE) for image in images
+                ])
+                screener_scores = self._predict_batch(screened, screener)
+            
+            escalated = []
+            for i, (confidence, is_deepfake) in enumerate(screener_scores):
+                if abs(confidence - self.confidence_threshold) > Config.CASCADE_UNCERTAINTY_BAND:
+                    scores[i] = (confidence, is_deepfake, "screener")
+                else:
+                    escalated.append(i)
+        
+        if escalated:
+            processed = np.concatenate([self.preprocess_image(images[i]) for i in escalated])
+            for i, (confidence, is_deepfake) in zip(escalated, self._predict_batch(processed, handle)):
+                scores[i] = (confidence, is_deepfake, "full")
+        
+        return scores
+    
+    def _count_stage(self, stage: Optional[str]):
+        """Contabiliza o estágio de um veredito no processo principal
+        
+        Chamado sobre os resultados (e não dentro de _score_batch) para que
+        frames pontuados nos workers de vídeo paralelo também entrem nas
+        estatísticas.
+        """
+        if self.screener_version is None or stage not in self._cascade_counts:
+            return
+        with self._cascade_lock:
+            self._cascade_counts[stage] += 1
+    
+    def get_cascade_stats(self) -> Dict:
+        """Estatísticas da cascata: quantas inferências foram escaladas ao modelo completo"""
+        with self._cascade_lock:
+            screened = self._cascade_counts["screener"] + self._cascade_counts["full"]
+            escalated = self._cascade_counts["full"]
+        return {
+            "enabled": self.screener_version is not None,
+            "screener_version": self.screener_version,
+            "uncertainty_band": Config.CASCADE_UNCERTAINTY_BAND,
+            "screened": screened,
+            "escalated": escalated,
+            "escalation_fraction": escalated / screened if screened else 0.0
+        }
+    
+    def preprocess_image(self, image: np.ndarray, image_size: Optional[Tuple[int, int]] = None,
+                         out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Pré-processa uma imagem para análise
+        
+        Com out (array float32 de formato (altura, largura, 3)), o resultado é
+        escrito diretamente nele, sem alocação intermediária.
+        """
+        image_size = image_size or self.image_size
         try:
-            # Converter para RGB se necessário
-            if len(image.shape) == 3 and image.shape[2] == 3:
-                image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            else:
-                image_rgb = image
-            
-            # Redimensionar
-            image_resized = cv2.resize(image_rgb, self.image_size)
-            
-            # Normalizar
-            image_normalized = image_resized.astype(np.float32) / 255.0
+            image_normalized = preprocess_frame(image, image_size, out)
             
             # Adicionar dimensão do batch
             image_batch = np.expand_dims(image_normalized, axis=0)
@@ -138,122 +299,181 @@ class DeepfakeDetector:
             logger.error(f"❌ Erro na detecção de faces: {e}")
             return []
     
-    def analyze_image(self, image_path: str) -> Dict:
+    def _lookup_cached_result(self, media_type: str, media_hash: Optional[int],
+                              max_distance: int, start_time: float) -> Optional[Dict]:
+        """Reaproveita o veredito de uma quase-duplicata já analisada
+        
+        Cada dHash de 64 bits do valor (imagem, faces, frames) precisa estar
+        dentro de PERCEPTUAL_HASH_MAX_DISTANCE, não apenas a soma.
+        """
+        if self.perceptual_cache is None or media_hash is None:
+            return None
+        
+        cached = self.perceptual_cache.lookup(media_type, media_hash, max_distance, component_bits=64)
+        if cached is None:
+            return None
+        
+        # Só o veredito é reaproveitado: faces, duração e frames pertencem ao
+        # arquivo original, não à cópia (redimensionada, recortada) enviada agora
+        result, distance = cached
+        return {
+            "is_deepfake": result["is_deepfake"],
+            "confidence": result["confidence"],
+            "message": "Veredito reaproveitado de uma análise quase idêntica",
+            "model_version": result.get("model_version"),
+            "reused_result": True,
+            "hash_distance": distance,
+            "processing_time": time.time() - start_time,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def _store_cached_result(self, media_type: str, media_hash: Optional[int], result: Dict):
+        """Guarda o veredito para reuso por quase-duplicatas
+        
+        Só os campos reaproveitados são retidos: guardar o resultado inteiro
+        manteria em memória, por entrada, todas as análises por frame do vídeo.
+        """
+        if self.perceptual_cache is None or media_hash is None or 'error' in result:
+            return
+        self.perceptual_cache.store(media_type, media_hash, {
+            "is_deepfake": result["is_deepfake"],
+            "confidence": result["confidence"],
+            "model_version": result.get("model_version")
+        })
+    
+    def analyze_image(self, image_path: str, model_version: Optional[str] = None) -> Dict:
         """Analisa uma imagem para detectar deepfake"""
+        return self.analyze_images([image_path], model_version)[0]
+    
+    def analyze_images(self, image_paths: List[str], model_version: Optional[str] = None) -> List[Dict]:
+        """Analisa várias imagens, agrupando as inferências em um único lote"""
         start_time = time.time()
         
         try:
-            # Carregar imagem
-            image = cv2.imread(image_path)
-            if image is None:
-                raise ValueError("Não foi possível carregar a imagem")
-            
-            # Detectar faces
-            faces = self.detect_faces(image)
-            
-            if not faces:
-                return {
-                    "is_deepfake": False,
-                    "confidence": 0.0,
-                    "faces_detected": 0,
-                    "message": "Nenhuma face detectada na imagem",
-                    "processing_time": time.time() - start_time,
-                    "timestamp": datetime.now().isoformat()
-                }
-            
-            # Pré-processar imagem
-            processed_image = self.preprocess_image(image)
-            
-            # Fazer predição
-            if self.model_loaded:
-                prediction = self.model.predict(processed_image, verbose=0)
-                confidence = float(prediction[0][0])
-                is_deepfake = confidence > self.confidence_threshold
-            else:
-                # Fallback para demonstração
-                confidence = 0.5
-                is_deepfake = False
-            
-            return {
-                "is_deepfake": is_deepfake,
-                "confidence": confidence,
-                "faces_detected": len(faces),
-                "faces": faces,
-                "message": "Análise concluída com sucesso",
-                "processing_time": time.time() - start_time,
-                "timestamp": datetime.now().isoformat()
-            }
+            with self._acquire_model(model_version) as handle:
+                return self._analyze_images(image_paths, handle, start_time)
             
         except Exception as e:
             logger.error(f"❌ Erro na análise de imagem: {e}")
-            return {
-                "is_deepfake": False,
-                "confidence": 0.0,
-                "faces_detected": 0,
-                "error": str(e),
-                "processing_time": time.time() - start_time,
-                "timestamp": datetime.now().isoformat()
-            }
+            return [self._image_error(e, model_version or self.registry.default_version, start_time)
+                    for _ in image_paths]
     
-    def analyze_video(self, video_path: str) -> Dict:
-        """Analisa um vídeo para detectar deepfake"""
-        start_time = time.time()
+    def _image_error(self, error: Exception, model_version: Optional[str], start_time: float) -> Dict:
+        return {
+            "is_deepfake": False,
+            "confidence": 0.0,
+            "faces_detected": 0,
+            "error": str(error),
+            "model_version": model_version,
+            "processing_time": time.time() - start_time,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def _analyze_images(self, image_paths: List[str], handle, start_time: float) -> List[Dict]:
+        """Análise de imagens com o modelo já reservado"""
+        model_version = handle.version if handle is not None else None
+        cache_type = f"image:{model_version}"
         
-        try:
-            cap = cv2.VideoCapture(video_path)
-            if not cap.isOpened():
-                raise ValueError("Não foi possível abrir o vídeo")
-            
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            duration = total_frames / fps if fps > 0 else 0
-            
-            # Limitar número de frames para análise
-            max_frames = min(Config.MAX_FRAMES_PER_VIDEO, total_frames)
-            frame_interval = max(1, total_frames // max_frames)
-            
-            frame_analyses = []
-            frame_count = 0
-            analyzed_frames = 0
-            
-            while analyzed_frames < max_frames:
-                ret, frame = cap.read()
-                if not ret:
-                    break
+        results: List[Optional[Dict]] = [None] * len(image_paths)
+        # (posição, imagem, faces, hash) das imagens que precisam de inferência
+        pending = []
+        
+        for i, image_path in enumerate(image_paths):
+            try:
+                # Carregar imagem (JPEGs grandes são decodificados em resolução reduzida)
+                image, reduction = decode_image(image_path, Config.DECODE_MIN_SIDE)
+                if image is None:
+                    raise ValueError("Não foi possível carregar a imagem")
+                decode_scale = 1.0 / reduction
                 
-                if frame_count % frame_interval == 0:
-                    # Analisar frame
-                    frame_analysis = self._analyze_frame(frame, frame_count)
-                    frame_analyses.append(frame_analysis)
-                    analyzed_frames += 1
+                detected_faces = self.detect_faces(image)
                 
-                frame_count += 1
-            
-            cap.release()
-            
-            # Calcular resultado geral
-            if frame_analyses:
-                avg_confidence = np.mean([f['confidence'] for f in frame_analyses])
-                deepfake_frames = sum(1 for f in frame_analyses if f['is_deepfake'])
-                deepfake_percentage = (deepfake_frames / len(frame_analyses)) * 100
+                # Hash perceptual da imagem e de cada face: quase-duplicatas
+                # reaproveitam o veredito anterior; só imagens com o mesmo
+                # número de faces são comparadas
+                image_hash = None
+                face_cache_type = f"{cache_type}:{len(detected_faces)}"
+                if self.perceptual_cache is not None:
+                    image_hash = face_dhash(image, detected_faces)
+                cached = self._lookup_cached_result(
+                    face_cache_type, image_hash,
+                    Config.PERCEPTUAL_HASH_MAX_DISTANCE * (1 + len(detected_faces)),
+                    start_time
+                )
+                if cached is not None:
+                    cached["decode_scale"] = decode_scale
+                    results[i] = cached
+                    continue
                 
-                is_deepfake = avg_confidence > self.confidence_threshold
-            else:
-                avg_confidence = 0.0
-                deepfake_percentage = 0.0
-                is_deepfake = False
-            
-            return {
-                "is_deepfake": is_deepfake,
-                "confidence": avg_confidence,
-                "deepfake_percentage": deepfake_percentage,
-                "total_frames": total_frames,
-                "analyzed_frames": len(frame_analyses),
-                "duration": duration,
-                "frame_analyses": frame_analyses,
-                "processing_time": time.time() - start_time,
-                "timestamp": datetime.now().isoformat()
-            }
+                # Coordenadas das faces convertidas para a resolução original
+                faces = [[int(v * reduction) for v in face] for face in detected_faces]
+                
+                if not faces:
+                    results[i] = {
+                        "is_deepfake": False,
+                        "confidence": 0.0,
+                        "faces_detected": 0,
+                        "message": "Nenhuma face detectada na imagem",
+                        "model_version": model_version,
+                        "decode_scale": decode_scale,
+                        "reused_result": False,
+                        "processing_time": time.time() - start_time,
+                        "timestamp": datetime.now().isoformat()
+                    }
+                    self._store_cached_result(face_cache_type, image_hash, results[i])
+                    continue
+                
+                # Guarda só a versão já na resolução do modelo, não a imagem inteira
+                pending.append((i, cv2.resize(image, self.image_size), faces, (face_cache_type, image_hash), decode_scale))
+                del image
+                
+            except Exception as e:
+                logger.error(f"❌ Erro na análise de imagem: {e}")
+                results[i] = self._image_error(e, model_version, start_time)
+        
+        if pending:
+            # Fazer predição (triagem + modelo completo, se a cascata estiver ativa)
+            scores = self._score_batch([image for _, image, _, _, _ in pending], handle)
+            
+            for (i, _, faces, (face_cache_type, image_hash), decode_scale), (confidence, is_deepfake, verdict_stage) in zip(pending, scores):
+                results[i] = {
+                    "is_deepfake": is_deepfake,
+                    "confidence": confidence,
+                    "faces_detected": len(faces),
+                    "faces": faces,
+                    "message": "Análise concluída com sucesso",
+                    "model_version": model_version,
+                    "verdict_stage": verdict_stage,
+                    "decode_scale": decode_scale,
+                    "reused_result": False,
+                    "processing_time": time.time() - start_time,
+                    "timestamp": datetime.now().isoformat()
+                }
+                self._count_stage(verdict_stage)
+                self._store_cached_result(face_cache_type, image_hash, results[i])
+        
+        return results
+    
+    def analyze_video(self, video_path: str, summary_only: Optional[bool] = None,
+                      parallel: Optional[bool] = None, model_version: Optional[str] = None) -> Dict:
+        """Analisa um vídeo para detectar deepfake
+        
+        Com summary_only, as análises por frame não são retidas: o resultado
+        traz apenas estatísticas agregadas e os frames mais suspeitos, de modo
+        que o uso de memória não cresce com a duração do vídeo. Com parallel,
+        o vídeo é dividido em segmentos analisados em processos separados.
+        O mesmo modelo é usado em todos os frames, mesmo que o padrão seja
+        trocado durante a análise.
+        """
+        start_time = time.time()
+        if summary_only is None:
+            summary_only = Config.VIDEO_SUMMARY_ONLY
+        if parallel is None:
+            parallel = Config.VIDEO_PARALLEL_ENABLED
+        
+        try:
+            with self._acquire_model(model_version) as handle:
+                return self._analyze_video(video_path, summary_only, parallel, handle, start_time)
             
         except Exception as e:
             logger.error(f"❌ Erro na análise de vídeo: {e}")
@@ -261,12 +481,157 @@ class DeepfakeDetector:
                 "is_deepfake": False,
                 "confidence": 0.0,
                 "error": str(e),
+                "model_version": model_version or self.registry.default_version,
                 "processing_time": time.time() - start_time,
                 "timestamp": datetime.now().isoformat()
             }
     
-    def _analyze_frame(self, frame: np.ndarray, frame_number: int) -> Dict:
+    def _analyze_video(self, video_path: str, summary_only: bool, parallel: bool,
+                       handle, start_time: float) -> Dict:
+        """Análise de vídeo com o modelo já reservado"""
+        model_version = handle.version if handle is not None else None
+        cache_type = f"{'video_summary' if summary_only else 'video'}:{model_version}"
+        
+        # Hash perceptual de frames amostrados, antes de qualquer inferência
+        video_hash = None
+        if self.perceptual_cache is not None:
+            video_hash = video_dhash(video_path, Config.PERCEPTUAL_VIDEO_SAMPLES, detect_faces=self.detect_faces)
+        # Dois hashes por frame amostrado: frame inteiro e maior face
+        cached = self._lookup_cached_result(
+            cache_type, video_hash,
+            Config.PERCEPTUAL_HASH_MAX_DISTANCE * Config.PERCEPTUAL_VIDEO_SAMPLES * 2,
+            start_time
+        )
+        if cached is not None:
+            return cached
+        
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError("Não foi possível abrir o vídeo")
+        
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        duration = total_frames / fps if fps > 0 else 0
+        
+        # Limitar número de frames para análise
+        max_frames = min(Config.MAX_FRAMES_PER_VIDEO, total_frames)
+        frame_interval = max(1, total_frames // max_frames) if max_frames > 0 else 1
+        
+        aggregator = StreamingVideoAggregator(
+            self.confidence_threshold,
+            top_k=Config.VIDEO_SUMMARY_TOP_K,
+            keep_frames=not summary_only
+        )
+        
+        frame_numbers = parallel_video.sample_frame_numbers(total_frames, max_frames)
+        
+        try:
+            if parallel and max_frames >= Config.VIDEO_PARALLEL_MIN_FRAMES:
+                # Cada worker abre sua própria captura
+                cap.release()
+                frame_analyses = parallel_video.analyze_segments(
+                    video_path, frame_numbers, frame_interval, model_version
+                )
+            elif frame_numbers:
+                frame_analyses = self._iter_frame_analyses(cap, frame_numbers, frame_interval, handle)
+            else:
+                frame_analyses = []
+            
+            for frame_analysis in frame_analyses:
+                aggregator.add(frame_analysis)
+                # Frames reaproveitados não passaram por inferência
+                if not frame_analysis.get('deduplicated'):
+                    self._count_stage(frame_analysis.get('verdict_stage'))
+        finally:
+            cap.release()
+        
+        result = {
+            "is_deepfake": aggregator.is_deepfake,
+            "confidence": aggregator.mean_confidence,
+            "deepfake_percentage": aggregator.deepfake_percentage,
+            "total_frames": total_frames,
+            "analyzed_frames": aggregator.count,
+            "deduplicated_frames": aggregator.deduplicated_frames,
+            "verdict_stages": aggregator.verdict_stages,
+            "duration": duration,
+            "model_version": model_version,
+            "reused_result": False,
+            "processing_time": time.time() - start_time,
+            "timestamp": datetime.now().isoformat()
+        }
+        
+        if summary_only:
+            result["summary"] = aggregator.summary()
+        else:
+            result["frame_analyses"] = aggregator.frame_analyses
+        
+        self._store_cached_result(cache_type, video_hash, result)
+        return result
+    
+    def _iter_frame_analyses(self, cap, grid: List[int], frame_interval: int, handle,
+                             start_index: int = 0, stop: Optional[int] = None) -> Iterator[Dict]:
+        """Percorre os frames da grade de amostragem e gera suas análises
+        
+        A captura deve estar posicionada em grid[0], cujo índice na grade
+        completa do vídeo é start_index. Com a deduplicação ativa, frames
+        intermediários (até stop, exclusive) usam o orçamento poupado por
+        duplicatas, e o deduplicador é reiniciado a cada
+        FRAME_DEDUP_BLOCK_FRAMES frames da grade: o resultado não depende de
+        como o vídeo é dividido entre processos.
+        """
+        oversample = Config.FRAME_DEDUP_OVERSAMPLE if Config.FRAME_DEDUP_ENABLED else 1
+        stop = grid[-1] + 1 if stop is None else stop
+        
+        # (número do frame, índice na grade ou None para intermediários)
+        candidates = []
+        for i, grid_frame in enumerate(grid):
+            candidates.append((grid_frame, start_index + i))
+            for j in range(1, oversample):
+                candidate = grid_frame + j * frame_interval // oversample
+                if candidates[-1][0] < candidate < min(grid_frame + frame_interval, stop):
+                    candidates.append((candidate, None))
+        
+        dedup = None
+        grid_frames = 0
+        scored_frames = 0
+        position = grid[0]
+        for frame_number, grid_index in candidates:
+            while position < frame_number:
+                # Frames ignorados não são decodificados
+                if not cap.grab():
+                    return
+                position += 1
+            ret, frame = cap.read()
+            if not ret:
+                return
+            position += 1
+            
+            on_grid = grid_index is not None
+            if on_grid:
+                if Config.FRAME_DEDUP_ENABLED and (dedup is None or grid_index % Config.FRAME_DEDUP_BLOCK_FRAMES == 0):
+                    dedup = FrameDeduplicator(Config.FRAME_DEDUP_MAX_DISTANCE)
+                    grid_frames = 0
+                    scored_frames = 0
+                grid_frames += 1
+            
+            if dedup is not None and dedup.check(frame):
+                # Quase idêntico ao último frame pontuado: reaproveita o score
+                if on_grid:
+                    yield dedup.reused(frame_number)
+            elif on_grid or scored_frames < grid_frames:
+                # Analisar frame e descartá-lo logo em seguida
+                frame_analysis = self._analyze_frame(frame, frame_number, handle)
+                scored_frames += 1
+                if dedup is not None:
+                    dedup.record(frame_analysis)
+                yield frame_analysis
+            del frame
+    
+    def _analyze_frame(self, frame: np.ndarray, frame_number: int, handle=None) -> Dict:
         """Analisa um frame individual do vídeo"""
+        if handle is None:
+            handle = self.registry.get_handle()
+        
         try:
             # Detectar faces
             faces = self.detect_faces(frame)
@@ -279,23 +644,15 @@ class DeepfakeDetector:
                     "faces_detected": 0
                 }
             
-            # Pré-processar frame
-            processed_frame = self.preprocess_image(frame)
-            
             # Fazer predição
-            if self.model_loaded:
-                prediction = self.model.predict(processed_frame, verbose=0)
-                confidence = float(prediction[0][0])
-                is_deepfake = confidence > self.confidence_threshold
-            else:
-                confidence = 0.5
-                is_deepfake = False
+            confidence, is_deepfake, verdict_stage = self._score(frame, handle)
             
             return {
                 "frame_number": frame_number,
                 "is_deepfake": is_deepfake,
                 "confidence": confidence,
-                "faces_detected": len(faces)
+                "faces_detected": len(faces),
+                "verdict_stage": verdict_stage
             }
             
         except Exception as e:
@@ -323,6 +680,8 @@ class DeepfakeDetector:
             return {
                 "loaded": True,
                 "model_name": Config.DEFAULT_MODEL,
+                "model_version": self.registry.default_version,
+                "registry": self.registry.info(),
                 "input_shape": self.model.input_shape,
                 "output_shape": self.model.output_shape,
                 "total_params": self.model.count_params(),
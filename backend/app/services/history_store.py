@@ -0,0 +1,293 @@
+import os
+import time
+import queue
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from ..utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    media_type TEXT NOT NULL,
+    is_deepfake INTEGER NOT NULL,
+    confidence REAL NOT NULL,
+    processing_time REAL,
+    model_version TEXT,
+    verdict_stage TEXT,
+    reused_result INTEGER NOT NULL DEFAULT 0,
+    content_hash TEXT,
+    filename TEXT,
+    file_size INTEGER,
+    error TEXT
+);
+-- Índices secundários terminam implicitamente no rowid (id): cada combinação
+-- de filtros percorre um índice já na ordem (created_at, id) da paginação
+CREATE INDEX IF NOT EXISTS idx_analyses_created_at ON analyses (created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_verdict ON analyses (is_deepfake, created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_media_type ON analyses (media_type, created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_media_type_verdict ON analyses (media_type, is_deepfake, created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_content_hash ON analyses (content_hash);
+
+CREATE TABLE IF NOT EXISTS analysis_rollups (
+    bucket_start INTEGER NOT NULL,
+    media_type TEXT NOT NULL,
+    total INTEGER NOT NULL DEFAULT 0,
+    deepfakes INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    confidence_sum REAL NOT NULL DEFAULT 0,
+    processing_time_sum REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_start, media_type)
+);
+"""
+
+ROLLUP_UPSERT = """
+INSERT INTO analysis_rollups (bucket_start, media_type, total, deepfakes, errors, confidence_sum, processing_time_sum)
+VALUES (?, ?, 1, ?, ?, ?, ?)
+ON CONFLICT (bucket_start, media_type) DO UPDATE SET
+    total = total + 1,
+    deepfakes = deepfakes + excluded.deepfakes,
+    errors = errors + excluded.errors,
+    confidence_sum = confidence_sum + excluded.confidence_sum,
+    processing_time_sum = processing_time_sum + excluded.processing_time_sum
+"""
+
+# Granularidades de consulta sobre os rollups (armazenados por hora)
+BUCKET_SECONDS = {
+    'hour': 3600,
+    'day': 86400
+}
+
+
+class HistoryStore:
+    """Histórico de análises em SQLite (WAL), gravado em lotes por uma thread própria
+
+    record() apenas enfileira: a inserção e a atualização dos rollups por hora
+    acontecem na thread de escrita, de modo que as requisições nunca esperam
+    pelo disco. O hash do conteúdo chega pronto, calculado durante o upload.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or Config.HISTORY_DB_PATH
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+
+        self._queue: queue.Queue = queue.Queue(maxsize=Config.HISTORY_QUEUE_SIZE)
+        self._local = threading.local()
+        self._stopped = threading.Event()
+        self.dropped = 0
+
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name='history-writer', daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        """Conexão de leitura por thread (leitores não bloqueiam o escritor no WAL)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def record(self, result: Dict, media_type: str, content_hash: str = None):
+        """Enfileira o resultado de uma análise para gravação"""
+        entry = {
+            "created_at": time.time(),
+            "media_type": media_type,
+            "is_deepfake": int(bool(result.get('is_deepfake'))),
+            "confidence": float(result.get('confidence') or 0.0),
+            "processing_time": result.get('processing_time'),
+            "model_version": result.get('model_version'),
+            "verdict_stage": result.get('verdict_stage'),
+            "reused_result": int(bool(result.get('reused_result'))),
+            "filename": result.get('filename'),
+            "file_size": result.get('file_size'),
+            "error": result.get('error'),
+            "content_hash": content_hash
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("⚠️ Fila do histórico cheia, análise não registrada")
+
+    def _write_loop(self):
+        conn = self._connect()
+        try:
+            while not (self._stopped.is_set() and self._queue.empty()):
+                try:
+                    batch = [self._queue.get(timeout=Config.HISTORY_FLUSH_INTERVAL)]
+                except queue.Empty:
+                    continue
+                # Agrupa o que mais estiver pendente em uma única transação
+                while len(batch) < Config.HISTORY_BATCH_SIZE:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                try:
+                    self._write_batch(conn, batch)
+                except Exception as e:
+                    logger.error(f"❌ Erro ao gravar histórico: {e}")
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[Dict]):
+        rows = []
+        rollups = []
+        for entry in batch:
+            rows.append((
+                entry["created_at"], entry["media_type"], entry["is_deepfake"], entry["confidence"],
+                entry["processing_time"], entry["model_version"], entry["verdict_stage"],
+                entry["reused_result"], entry["content_hash"], entry["filename"], entry["file_size"], entry["error"]
+            ))
+            bucket_start = int(entry["created_at"]) // 3600 * 3600
+            rollups.append((
+                bucket_start, entry["media_type"], entry["is_deepfake"], int(entry["error"] is not None),
+                entry["confidence"], entry["processing_time"] or 0.0
+            ))
+
+        with conn:
+            conn.executemany(
+                "INSERT INTO analyses (created_at, media_type, is_deepfake, confidence, processing_time, "
+                "model_version, verdict_stage, reused_result, content_hash, filename, file_size, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.executemany(ROLLUP_UPSERT, rollups)
+
+    def close(self, timeout: float = 10.0):
+        """Grava o que estiver pendente e encerra a thread de escrita"""
+        self._stopped.set()
+        self._writer.join(timeout)
+
+    @staticmethod
+    def _encode_cursor(item: Dict) -> str:
+        return f"{item['created_at']!r}:{item['id']}"
+
+    @staticmethod
+    def _decode_cursor(cursor: str):
+        try:
+            created_at, row_id = cursor.split(':')
+            return float(created_at), int(row_id)
+        except ValueError:
+            raise ValueError(f"Cursor inválido: {cursor}")
+
+    def query(self, limit: int = 50, cursor: Optional[str] = None, media_type: str = None,
+              is_deepfake: Optional[bool] = None, since: float = None, until: float = None,
+              content_hash: str = None) -> Dict:
+        """Análises mais recentes primeiro, com paginação por cursor (created_at, id)
+
+        O cursor evita OFFSET, cujo custo cresce com a profundidade da página,
+        e segue a ordem dos índices: nenhuma página exige ordenação.
+        """
+        limit = max(1, min(limit, Config.HISTORY_MAX_PAGE_SIZE))
+        clauses = []
+        params: List = []
+        if cursor is not None:
+            clauses.append("(created_at, id) < (?, ?)")
+            params.extend(self._decode_cursor(cursor))
+        if media_type:
+            clauses.append("media_type = ?")
+            params.append(media_type)
+        if is_deepfake is not None:
+            clauses.append("is_deepfake = ?")
+            params.append(int(is_deepfake))
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if content_hash:
+            clauses.append("content_hash = ?")
+            params.append(content_hash)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._reader().execute(
+            f"SELECT * FROM analyses {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+
+        items = [dict(row) for row in rows[:limit]]
+        for item in items:
+            item["is_deepfake"] = bool(item["is_deepfake"])
+            item["reused_result"] = bool(item["reused_result"])
+        return {
+            "items": items,
+            "next_cursor": self._encode_cursor(items[-1]) if len(rows) > limit else None
+        }
+
+    def rollups(self, bucket: str = 'hour', since: float = None, until: float = None,
+                media_type: str = None) -> List[Dict]:
+        """Agregados por intervalo de tempo, calculados sobre os rollups por hora"""
+        if bucket not in BUCKET_SECONDS:
+            raise ValueError(f"Intervalo inválido: {bucket}")
+        size = BUCKET_SECONDS[bucket]
+
+        clauses = []
+        params: List = [size, size]
+        if since is not None:
+            clauses.append("bucket_start >= ?")
+            params.append(int(since) // 3600 * 3600)
+        if until is not None:
+            clauses.append("bucket_start < ?")
+            params.append(until)
+        if media_type:
+            clauses.append("media_type = ?")
+            params.append(media_type)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        rows = self._reader().execute(
+            f"SELECT bucket_start / ? * ? AS bucket, SUM(total) AS total, SUM(deepfakes) AS deepfakes, "
+            f"SUM(errors) AS errors, SUM(confidence_sum) AS confidence_sum, "
+            f"SUM(processing_time_sum) AS processing_time_sum "
+            f"FROM analysis_rollups {where} GROUP BY bucket ORDER BY bucket",
+            params
+        ).fetchall()
+
+        return [
+            {
+                "bucket_start": row["bucket"],
+                "total": row["total"],
+                "deepfakes": row["deepfakes"],
+                "errors": row["errors"],
+                "average_confidence": row["confidence_sum"] / row["total"] if row["total"] else 0.0,
+                "average_processing_time": row["processing_time_sum"] / row["total"] if row["total"] else 0.0
+            }
+            for row in rows
+        ]
+
+    def stats(self) -> Dict:
+        """Totais gerais, lidos dos rollups (sem varrer a tabela de análises)"""
+        row = self._reader().execute(
+            "SELECT COALESCE(SUM(total), 0) AS total, COALESCE(SUM(deepfakes), 0) AS deepfakes, "
+            "COALESCE(SUM(errors), 0) AS errors, COALESCE(SUM(processing_time_sum), 0) AS processing_time_sum "
+            "FROM analysis_rollups"
+        ).fetchone()
+        total = row["total"]
+        return {
+            "total_analyses": total,
+            "successful_analyses": total - row["errors"],
+            "failed_analyses": row["errors"],
+            "deepfakes_detected": row["deepfakes"],
+            "average_processing_time": row["processing_time_sum"] / total if total else 0.0,
+            "pending_writes": self._queue.qsize(),
+            "dropped_writes": self.dropped
+        }
@@ -0,0 +1,247 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+from tensorflow import keras
+
+from ..utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+MODEL_EXTENSIONS = ('.h5', '.keras')
+
+
+class ModelHandle:
+    """Modelo carregado, com contagem das requisições que o estão usando"""
+
+    def __init__(self, version: str, model, path: Optional[str] = None):
+        self.version = version
+        self.model = model
+        self.path = path
+        self._in_use = 0
+        self._retired = False
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            self._in_use += 1
+
+    def release(self):
+        with self._lock:
+            self._in_use -= 1
+            self._maybe_free()
+
+    def retire(self):
+        """Marca o modelo para liberação assim que as requisições em curso terminarem"""
+        with self._lock:
+            self._retired = True
+            self._maybe_free()
+
+    def _maybe_free(self):
+        if self._retired and self._in_use == 0 and self.model is not None:
+            self.model = None
+            logger.info(f"♻️ Modelo liberado: {self.version}")
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+
+class ModelRegistry:
+    """Registro de modelos versionados em ml_models/, com troca a quente"""
+
+    def __init__(self, model_path: str = None):
+        self.model_path = model_path or Config.MODEL_PATH
+        self._handles: Dict[str, ModelHandle] = {}
+        self._default_version: Optional[str] = None
+        # Versões carregadas sob demanda por requisições, da menos à mais recente
+        self._on_demand: "OrderedDict[str, None]" = OrderedDict()
+        # Chamados (na thread da troca) depois que uma nova versão padrão é ativada
+        self._activate_listeners: List[Callable[[str], None]] = []
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+
+    @staticmethod
+    def version_from_filename(filename: str) -> str:
+        """Versão de um modelo a partir do nome do arquivo (sem extensão)"""
+        return os.path.splitext(filename)[0]
+
+    def available_versions(self) -> List[str]:
+        """Versões disponíveis em disco"""
+        if not os.path.isdir(self.model_path):
+            return []
+        return sorted(
+            self.version_from_filename(name)
+            for name in os.listdir(self.model_path)
+            if name.endswith(MODEL_EXTENSIONS)
+        )
+
+    def selectable_versions(self) -> List[str]:
+        """Versões que podem ser escolhidas por requisição ou ativadas (sem o modelo de triagem)"""
+        screener = self.version_from_filename(Config.SCREENER_MODEL)
+        return [version for version in self.available_versions() if version != screener]
+
+    def _find_model_file(self, version: str) -> str:
+        # Só nomes listados em ml_models/ são aceitos (evita caminhos como ../)
+        if version not in self.available_versions():
+            raise ValueError(f"Modelo não encontrado: {version}")
+        for extension in MODEL_EXTENSIONS:
+            path = os.path.join(self.model_path, version + extension)
+            if os.path.exists(path):
+                return path
+        raise ValueError(f"Modelo não encontrado: {version}")
+
+    @property
+    def default_version(self) -> Optional[str]:
+        return self._default_version
+
+    def register(self, version: str, model, path: Optional[str] = None, make_default: bool = False) -> ModelHandle:
+        """Registra um modelo já carregado em memória"""
+        handle = ModelHandle(version, model, path)
+        retired = []
+        with self._lock:
+            previous = self._handles.get(version)
+            if previous is not None:
+                retired.append(previous)
+            self._handles[version] = handle
+            if make_default or self._default_version is None:
+                self._on_demand.pop(version, None)
+                old_default = self._default_version
+                self._default_version = version
+                # O padrão anterior deixa o registro, mas só é liberado
+                # quando as requisições que o estão usando terminarem
+                if old_default is not None and old_default != version:
+                    old_handle = self._handles.pop(old_default, None)
+                    if old_handle is not None:
+                        retired.append(old_handle)
+        for old_handle in retired:
+            old_handle.retire()
+        return handle
+
+    def load(self, version: str, make_default: bool = False) -> ModelHandle:
+        """Carrega e aquece um modelo do disco, registrando-o"""
+        path = self._find_model_file(version)
+        model = keras.models.load_model(path)
+        self._warm_up(model)
+        logger.info(f"✅ Modelo carregado: {path}")
+        return self.register(version, model, path, make_default)
+
+    @staticmethod
+    def _warm_up(model):
+        """Executa uma inferência vazia para compilar o grafo antes do uso"""
+        input_shape = model.input_shape[1:]
+        model.predict(np.zeros((1, *input_shape), dtype=np.float32), verbose=0)
+
+    def is_loaded(self, version: Optional[str] = None) -> bool:
+        version = version or self._default_version
+        with self._lock:
+            handle = self._handles.get(version)
+        return handle is not None and handle.model is not None
+
+    def get_handle(self, version: Optional[str] = None) -> Optional[ModelHandle]:
+        """Retorna o handle de uma versão (ou da padrão) sem reservá-lo"""
+        with self._lock:
+            return self._handles.get(version or self._default_version)
+
+    @contextmanager
+    def acquire(self, version: Optional[str] = None) -> Iterator[ModelHandle]:
+        """Reserva um modelo durante a requisição; versões ausentes são carregadas do disco"""
+        with self._lock:
+            handle = self._handles.get(version or self._default_version)
+            if handle is not None:
+                handle.acquire()
+                if version in self._on_demand:
+                    self._on_demand.move_to_end(version)
+
+        if handle is None:
+            if version is None:
+                raise ValueError("Nenhum modelo carregado")
+            if Config.MODEL_MAX_ON_DEMAND <= 0:
+                raise ValueError(f"Versão não carregada: {version}")
+            with self._swap_lock:
+                if not self.is_loaded(version):
+                    self.load(version)
+                    self._evict_on_demand(version)
+                # Reservado ainda sob _swap_lock, antes que outra carga o descarte
+                with self._lock:
+                    handle = self._handles[version]
+                    handle.acquire()
+
+        try:
+            yield handle
+        finally:
+            handle.release()
+
+    def _evict_on_demand(self, version: str):
+        """Registra uma versão carregada sob demanda, descarregando as menos usadas além do limite"""
+        evicted = []
+        with self._lock:
+            self._on_demand[version] = None
+            while len(self._on_demand) > Config.MODEL_MAX_ON_DEMAND:
+                old_version, _ = self._on_demand.popitem(last=False)
+                handle = self._handles.pop(old_version, None)
+                if handle is not None:
+                    evicted.append(handle)
+        for handle in evicted:
+            handle.retire()
+
+    def add_activate_listener(self, callback: Callable[[str], None]):
+        """Registra uma função chamada com a versão recém-ativada"""
+        self._activate_listeners.append(callback)
+
+    def activate(self, version: str) -> ModelHandle:
+        """Carrega e aquece uma versão e a torna padrão de forma atômica"""
+        with self._swap_lock:
+            handle = self.load(version, make_default=True)
+            logger.info(f"🔄 Modelo padrão alterado para {version}")
+
+        for callback in self._activate_listeners:
+            try:
+                callback(version)
+            except Exception as e:
+                logger.error(f"❌ Erro ao propagar troca do modelo {version}: {e}")
+        return handle
+
+    def activate_async(self, version: str) -> threading.Thread:
+        """Troca o modelo padrão em segundo plano, sem bloquear requisições"""
+        # Falha cedo se o arquivo não existir ou não puder ser o modelo padrão
+        if version not in self.selectable_versions():
+            raise ValueError(f"Modelo não encontrado: {version}")
+
+        def run():
+            try:
+                self.activate(version)
+            except Exception as e:
+                logger.error(f"❌ Erro ao ativar modelo {version}: {e}")
+
+        thread = threading.Thread(target=run, name=f"model-swap-{version}", daemon=True)
+        thread.start()
+        return thread
+
+    def unload(self, version: str):
+        """Remove uma versão do registro; o modelo é liberado após as requisições em curso"""
+        with self._lock:
+            if version == self._default_version:
+                raise ValueError("Não é possível descarregar o modelo padrão")
+            handle = self._handles.pop(version, None)
+            self._on_demand.pop(version, None)
+        if handle is not None:
+            handle.retire()
+
+    def info(self) -> Dict:
+        """Estado do registro de modelos"""
+        with self._lock:
+            loaded = {
+                version: {"path": handle.path, "in_use": handle.in_use}
+                for version, handle in self._handles.items()
+                if handle.model is not None
+            }
+        return {
+            "default_version": self._default_version,
+            "loaded": loaded,
+            "available": self.selectable_versions()
+        }
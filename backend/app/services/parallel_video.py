@@ -0,0 +1,206 @@
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+
+from ..utils.config import Config
+from ..utils.threading_config import apply_thread_settings, load_tuning, resolve_thread_settings
+
+logger = logging.getLogger(__name__)
+
+# Detector próprio de cada processo worker (criado no initializer)
+_worker_detector = None
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+# Versão padrão carregada pelos workers ao iniciar (None = a do Config)
+_executor_version: Optional[str] = None
+_executor_lock = threading.Lock()
+
+
+def _init_worker(workers: int, default_version: Optional[str] = None):
+    """Carrega o detector (e a versão padrão do processo principal) uma única vez por worker"""
+    global _worker_detector
+    settings = resolve_thread_settings()
+    # Sem configuração explícita ou autotune, divide os núcleos entre os
+    # workers em vez de cada runtime do TensorFlow usar todos eles
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    if settings.get("tf_intra_op_threads") is None:
+        settings["tf_intra_op_threads"] = threads
+    if settings.get("opencv_threads") is None:
+        settings["opencv_threads"] = threads
+    apply_thread_settings(settings)
+
+    # Outras versões (?model=) são carregadas sob demanda e mantidas em LRU
+    # limitado; ao menos uma, para atender a versão pedida pelo processo principal
+    Config.MODEL_MAX_ON_DEMAND = max(1, Config.MODEL_MAX_ON_DEMAND)
+
+    from .deepfake_detector import DeepfakeDetector
+    _worker_detector = DeepfakeDetector()
+    if default_version is not None and default_version != _worker_detector.registry.default_version:
+        _worker_detector.registry.activate(default_version)
+
+
+def _ping() -> int:
+    """Tarefa vazia, usada para forçar a inicialização de todos os workers"""
+    return os.getpid()
+
+
+def _analyze_segment(video_path: str, frame_numbers: List[int], frame_interval: int, start_index: int,
+                     stop: Optional[int], model_version: Optional[str] = None) -> List[Dict]:
+    """Analisa, com uma captura própria, os frames de um segmento do vídeo"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError("Não foi possível abrir o vídeo")
+
+    try:
+        # O worker usa a mesma versão de modelo que o processo principal
+        with _worker_detector._acquire_model(model_version) as handle:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_numbers[0])
+            # Mesmo percurso da análise sequencial, a partir do início do segmento
+            return list(_worker_detector._iter_frame_analyses(
+                cap, frame_numbers, frame_interval, handle, start_index, stop
+            ))
+    finally:
+        cap.release()
+
+
+def _create_executor(workers: int, default_version: Optional[str]) -> ProcessPoolExecutor:
+    # 'spawn' evita herdar o estado do TensorFlow do processo pai
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(workers, default_version)
+    )
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Retorna o pool de processos compartilhado, criando-o sob demanda"""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None:
+            workers = Config.VIDEO_PARALLEL_WORKERS or load_tuning().get('workers') or os.cpu_count() or 1
+            _executor = _create_executor(workers, _executor_version)
+            _executor_workers = workers
+            logger.info(f"✅ Pool de análise de vídeo iniciado com {workers} processos")
+        return _executor
+
+
+def refresh_executor(version: str):
+    """Troca o pool por outro cujos workers já carregaram e aqueceram a nova versão padrão
+
+    Chamada na thread da troca a quente: o pool novo é criado e inicializado
+    por completo antes de substituir o atual, e os segmentos em andamento
+    terminam no pool antigo, encerrado em seguida.
+    """
+    global _executor, _executor_version
+    with _executor_lock:
+        if _executor is None or _executor_version == version:
+            # Sem pool ativo: o próximo já nasce com a nova versão
+            _executor_version = version
+            return
+        workers = _executor_workers
+
+    executor = _create_executor(workers, version)
+    # Uma tarefa por worker força a criação (e a inicialização) de todos eles
+    done, _ = wait([executor.submit(_ping) for _ in range(workers)])
+    try:
+        for future in done:
+            future.result()
+    except Exception as e:
+        logger.error(f"❌ Falha ao preparar o pool com o modelo {version}: {e}")
+        executor.shutdown(wait=False, cancel_futures=True)
+        return
+
+    with _executor_lock:
+        previous, _executor, _executor_version = _executor, executor, version
+    logger.info(f"🔄 Pool de análise de vídeo trocado para o modelo {version}")
+    if previous is not None:
+        previous.shutdown(wait=True)
+
+
+def _discard_executor(executor: ProcessPoolExecutor):
+    """Descarta um pool quebrado (worker morto) para que o próximo seja recriado"""
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_executor():
+    """Encerra o pool de processos, se estiver ativo"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+def sample_frame_numbers(total_frames: int, max_frames: int) -> List[int]:
+    """Índices dos frames amostrados, idênticos aos da análise sequencial"""
+    if total_frames <= 0 or max_frames <= 0:
+        return []
+    frame_interval = max(1, total_frames // max_frames)
+    return list(range(0, total_frames, frame_interval))[:max_frames]
+
+
+def split_segments(count: int, segments: int, block: int = 1) -> List[Tuple[int, int]]:
+    """Divide `count` frames amostrados em intervalos contíguos (início, fim) equilibrados
+
+    Os limites caem sempre em múltiplos de `block`, para que nenhum bloco de
+    deduplicação seja dividido entre processos.
+    """
+    blocks = -(-count // block)
+    segments = max(1, min(segments, blocks))
+    size, remainder = divmod(blocks, segments)
+
+    ranges = []
+    start = 0
+    for i in range(segments):
+        end = start + size + (1 if i < remainder else 0)
+        ranges.append((start * block, min(end * block, count)))
+        start = end
+    return [(start, end) for start, end in ranges if start < end]
+
+
+def analyze_segments(video_path: str, frame_numbers: List[int], frame_interval: int,
+                     model_version: Optional[str] = None) -> List[Dict]:
+    """Analisa os segmentos em paralelo e devolve os frames em ordem
+
+    Se um worker morrer (falta de memória, falha nativa), o pool é recriado
+    e a análise é repetida uma vez.
+    """
+    executor = get_executor()
+    try:
+        return _run_segments(executor, video_path, frame_numbers, frame_interval, model_version)
+    except BrokenProcessPool:
+        logger.warning("⚠️ Pool de análise de vídeo quebrado, recriando")
+        _discard_executor(executor)
+        return _run_segments(get_executor(), video_path, frame_numbers, frame_interval, model_version)
+
+
+def _run_segments(executor: ProcessPoolExecutor, video_path: str, frame_numbers: List[int],
+                  frame_interval: int, model_version: Optional[str]) -> List[Dict]:
+    block = Config.FRAME_DEDUP_BLOCK_FRAMES if Config.FRAME_DEDUP_ENABLED else 1
+    segments = split_segments(len(frame_numbers), _executor_workers, block)
+
+    futures = [
+        executor.submit(
+            _analyze_segment, video_path, frame_numbers[start:end], frame_interval, start,
+            frame_numbers[end] if end < len(frame_numbers) else None, model_version
+        )
+        for start, end in segments
+    ]
+
+    # Os resultados são combinados na ordem dos segmentos, não de conclusão
+    frame_analyses = []
+    for future in futures:
+        frame_analyses.extend(future.result())
+    return frame_analyses
@@ -0,0 +1,245 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+def dhash(image: np.ndarray, hash_size: int = 8) -> int:
+    """Calcula o difference hash (dHash) de uma imagem"""
+    if len(image.shape) == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    resized = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    diff = resized[:, 1:] > resized[:, :-1]
+
+    value = 0
+    for bit in diff.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+
+def face_dhash(image: np.ndarray, faces: Sequence[Sequence[int]], hash_size: int = 8) -> int:
+    """Concatena o dHash da imagem inteira com o dHash de cada face (da esquerda para a direita)
+
+    Uma troca de rosto altera só a região da face, que pesa pouco no hash da
+    imagem inteira; o hash do recorte da face a torna visível.
+    """
+    bits = hash_size * hash_size
+    value = dhash(image, hash_size)
+    for x, y, w, h in sorted(tuple(face) for face in faces):
+        value = (value << bits) | dhash(image[y:y + h, x:x + w], hash_size)
+    return value
+
+
+def largest_face_dhash(image: np.ndarray, faces: Sequence[Sequence[int]], hash_size: int = 8) -> int:
+    """dHash do recorte da maior face (0 se não houver face)"""
+    if len(faces) == 0:
+        return 0
+    x, y, w, h = max(faces, key=lambda face: face[2] * face[3])
+    return dhash(image[y:y + h, x:x + w], hash_size)
+
+
+def video_dhash(video_path: str, samples: int, hash_size: int = 8,
+                detect_faces: Optional[Callable[[np.ndarray], List]] = None) -> Optional[int]:
+    """Concatena os dHashes de frames amostrados uniformemente ao longo do vídeo
+
+    Com detect_faces, cada frame contribui também com o dHash do recorte da
+    maior face (veja face_dhash).
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+
+    try:
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if total_frames <= 0:
+            return None
+
+        bits = hash_size * hash_size
+        value = 0
+        for i in range(samples):
+            # Pontos centrais de cada fatia, para não depender do primeiro frame
+            position = int((i + 0.5) * total_frames / samples)
+            cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+            ret, frame = cap.read()
+            if not ret:
+                return None
+            value = (value << bits) | dhash(frame, hash_size)
+            if detect_faces is not None:
+                value = (value << bits) | largest_face_dhash(frame, detect_faces(frame), hash_size)
+        return value
+    finally:
+        cap.release()
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Distância de Hamming entre dois hashes"""
+    return bin(a ^ b).count('1')
+
+
+def within_each_component(a: int, b: int, component_bits: int, max_distance: int) -> bool:
+    """Indica se cada hash concatenado (de component_bits bits) está dentro de max_distance"""
+    mask = (1 << component_bits) - 1
+    diff = a ^ b
+    while diff:
+        if bin(diff & mask).count('1') > max_distance:
+            return False
+        diff >>= component_bits
+    return True
+
+
+class FrameDeduplicator:
+    """Reaproveita a análise do último frame pontuado para frames quase idênticos"""
+
+    def __init__(self, max_distance: int):
+        self.max_distance = max_distance
+        self._last_hash: Optional[int] = None
+        self._last_analysis: Optional[Dict] = None
+        self._pending_hash: Optional[int] = None
+
+    def check(self, frame: np.ndarray) -> bool:
+        """Indica se o frame é quase idêntico ao último frame pontuado"""
+        self._pending_hash = dhash(frame)
+        return (
+            self._last_hash is not None
+            and hamming_distance(self._pending_hash, self._last_hash) <= self.max_distance
+        )
+
+    def reused(self, frame_number: int) -> Dict:
+        """Análise do último frame pontuado, atribuída ao frame atual"""
+        analysis = dict(self._last_analysis)
+        analysis.pop('error', None)
+        analysis["frame_number"] = frame_number
+        analysis["deduplicated"] = True
+        return analysis
+
+    def record(self, analysis: Dict):
+        """Registra o frame recém-pontuado como referência para os próximos"""
+        self._last_hash = self._pending_hash
+        self._last_analysis = analysis
+
+
+class BKTree:
+    """Árvore BK para busca de hashes por distância de Hamming"""
+
+    def __init__(self):
+        self._root: Optional[Tuple[int, Dict[int, tuple]]] = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, value: int):
+        """Insere um hash na árvore"""
+        if self._root is None:
+            self._root = (value, {})
+            self._size = 1
+            return
+
+        node = self._root
+        while True:
+            distance = hamming_distance(value, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (value, {})
+                self._size += 1
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, int]]:
+        """Retorna (distância, hash) de todos os hashes dentro do raio informado"""
+        if self._root is None:
+            return []
+
+        matches = []
+        candidates = [self._root]
+        while candidates:
+            node_value, children = candidates.pop()
+            distance = hamming_distance(value, node_value)
+            if distance <= max_distance:
+                matches.append((distance, node_value))
+            # Desigualdade triangular: só filhos em [d - r, d + r] podem casar
+            low, high = distance - max_distance, distance + max_distance
+            for child_distance, child in children.items():
+                if low <= child_distance <= high:
+                    candidates.append(child)
+        return matches
+
+
+class PerceptualCache:
+    """Cache de vereditos indexado por hash perceptual, com busca por quase-duplicatas"""
+
+    def __init__(self, max_distance: int, max_entries: int):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._trees: Dict[str, BKTree] = {}
+        self._entries: Dict[str, OrderedDict] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, media_type: str, value: int, max_distance: Optional[int] = None,
+               component_bits: Optional[int] = None) -> Optional[Tuple[Dict, int]]:
+        """Retorna (resultado armazenado, distância) do vizinho mais próximo, se houver
+
+        Com component_bits, o valor é tratado como hashes concatenados e cada
+        um deles precisa estar dentro de self.max_distance, além do total.
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+
+        with self._lock:
+            tree = self._trees.get(media_type)
+            entries = self._entries.get(media_type)
+            if tree is None:
+                self.misses += 1
+                return None
+
+            matches = [m for m in tree.search(value, max_distance) if m[1] in entries]
+            if component_bits:
+                matches = [
+                    m for m in matches
+                    if within_each_component(value, m[1], component_bits, self.max_distance)
+                ]
+            if not matches:
+                self.misses += 1
+                return None
+
+            distance, key = min(matches)
+            entries.move_to_end(key)
+            self.hits += 1
+            return dict(entries[key]), distance
+
+    def store(self, media_type: str, value: int, result: Dict):
+        """Armazena o veredito associado a um hash"""
+        with self._lock:
+            tree = self._trees.setdefault(media_type, BKTree())
+            entries = self._entries.setdefault(media_type, OrderedDict())
+
+            entries[value] = dict(result)
+            entries.move_to_end(value)
+            tree.add(value)
+
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+            # Árvores BK não suportam remoção: hashes descartados ficam na árvore
+            # (e são ignorados na busca) até que ela seja reconstruída
+            if len(tree) > 2 * self.max_entries:
+                rebuilt = BKTree()
+                for key in entries:
+                    rebuilt.add(key)
+                self._trees[media_type] = rebuilt
+
+    def stats(self) -> Dict:
+        """Estatísticas de uso do cache"""
+        with self._lock:
+            return {
+                "entries": {media_type: len(entries) for media_type, entries in self._entries.items()},
+                "hits": self.hits,
+                "misses": self.misses,
+                "max_distance": self.max_distance
+            }
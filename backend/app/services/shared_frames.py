@@ -0,0 +1,164 @@
+import queue
+import logging
+import multiprocessing
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SharedFrameRing:
+    """Ring buffer de frames em memória compartilhada entre processos
+
+    Os frames ficam em slots de um bloco SharedMemory; pelas filas trafegam
+    apenas índices de slot (e metadados pequenos), nunca os pixels. O
+    produtor reserva um slot livre, escreve nele e o publica; o consumidor lê
+    o slot publicado e o devolve à fila de livres.
+    """
+
+    def __init__(self, slots: int, shape: Tuple[int, ...], dtype=np.float32, ctx=None):
+        ctx = ctx or multiprocessing.get_context('spawn')
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+
+        size = slots * int(np.prod(self.shape)) * self.dtype.itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._owner = True
+        self.free_queue = ctx.Queue()
+        self.ready_queue = ctx.Queue()
+        for index in range(slots):
+            self.free_queue.put(index)
+
+        self._frames = np.ndarray((slots, *self.shape), dtype=self.dtype, buffer=self._shm.buf)
+
+    def spec(self) -> Dict[str, Any]:
+        """Descrição do ring para ser passada a outro processo (via argumentos do Process)"""
+        return {
+            "name": self._shm.name,
+            "slots": self.slots,
+            "shape": self.shape,
+            "dtype": self.dtype.str,
+            "free_queue": self.free_queue,
+            "ready_queue": self.ready_queue
+        }
+
+    @classmethod
+    def attach(cls, spec: Dict[str, Any]) -> 'SharedFrameRing':
+        """Conecta-se, em outro processo, a um ring criado pelo processo principal"""
+        ring = cls.__new__(cls)
+        ring.slots = spec["slots"]
+        ring.shape = tuple(spec["shape"])
+        ring.dtype = np.dtype(spec["dtype"])
+        ring._shm = shared_memory.SharedMemory(name=spec["name"])
+        ring._owner = False
+        ring.free_queue = spec["free_queue"]
+        ring.ready_queue = spec["ready_queue"]
+        ring._frames = np.ndarray((ring.slots, *ring.shape), dtype=ring.dtype, buffer=ring._shm.buf)
+        return ring
+
+    def slot(self, index: int) -> np.ndarray:
+        """View (sem cópia) do slot informado"""
+        return self._frames[index]
+
+    def acquire_slot(self, timeout: Optional[float] = None) -> int:
+        """Reserva um slot livre, bloqueando enquanto o ring estiver cheio"""
+        return self.free_queue.get(timeout=timeout)
+
+    def publish(self, index: int, metadata: Any = None):
+        """Entrega ao consumidor um slot já preenchido"""
+        self.ready_queue.put((index, metadata))
+
+    def finish(self):
+        """Sinaliza ao consumidor que o produtor terminou"""
+        self.ready_queue.put(None)
+
+    def consume(self, timeout: Optional[float] = None) -> Optional[Tuple[int, Any]]:
+        """Próximo slot publicado, ou None quando o produtor terminou"""
+        return self.ready_queue.get(timeout=timeout)
+
+    def release_slot(self, index: int):
+        """Devolve um slot já consumido à fila de livres"""
+        self.free_queue.put(index)
+
+    def close(self):
+        """Libera o mapeamento local e, no processo criador, remove o bloco"""
+        self._frames = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def decode_video_to_ring(spec: Dict[str, Any], video_path: str, frame_numbers: List[int],
+                         image_size: Tuple[int, int]):
+    """Processo decodificador: lê os frames e os pré-processa direto nos slots"""
+    import cv2
+    from ..utils.image_processing import preprocess_frame
+
+    ring = SharedFrameRing.attach(spec)
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened() or not frame_numbers:
+            return
+
+        targets = set(frame_numbers)
+        last = frame_numbers[-1]
+        position = frame_numbers[0]
+        cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+
+        while position <= last:
+            if position in targets:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                index = ring.acquire_slot()
+                preprocess_frame(frame, image_size, out=ring.slot(index))
+                ring.publish(index, position)
+            elif not cap.grab():
+                break
+            position += 1
+    finally:
+        cap.release()
+        ring.finish()
+        ring.close()
+
+
+def iter_batches(ring: SharedFrameRing, batch_size: int,
+                 timeout: Optional[float] = None) -> Iterator[Tuple[np.ndarray, List[Any]]]:
+    """Agrupa os slots publicados em lotes prontos para model.predict
+
+    O lote é montado em um único buffer reaproveitado entre iterações; os
+    slots são devolvidos ao produtor assim que copiados para o lote. Se
+    nenhum frame chegar dentro de timeout, levanta TimeoutError (o fim do
+    vídeo é sinalizado apenas por finish()); cabe ao chamador encerrar o
+    processo decodificador.
+    """
+    batch = np.empty((batch_size, *ring.shape), dtype=ring.dtype)
+    metadata: List[Any] = []
+    finished = False
+
+    while not finished:
+        try:
+            item = ring.consume(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"Nenhum frame do decodificador em {timeout} s")
+
+        if item is None:
+            finished = True
+        else:
+            index, meta = item
+            batch[len(metadata)] = ring.slot(index)
+            ring.release_slot(index)
+            metadata.append(meta)
+
+        if metadata and (finished or len(metadata) == batch_size):
+            yield batch[:len(metadata)], metadata
+            metadata = []
@@ -0,0 +1,92 @@
+import heapq
+import itertools
+from typing import Dict, List, Optional
+
+
+class StreamingVideoAggregator:
+    """Agrega análises de frames em memória constante"""
+
+    def __init__(self, confidence_threshold: float, top_k: int = 10, keep_frames: bool = True):
+        self.confidence_threshold = confidence_threshold
+        self.top_k = max(0, top_k)
+        self.keep_frames = keep_frames
+
+        self.count = 0
+        self.deepfake_frames = 0
+        self.frames_with_faces = 0
+        self.deduplicated_frames = 0
+        self.verdict_stages: Dict[str, int] = {}
+        self.mean_confidence = 0.0
+        self.max_confidence = 0.0
+        self.min_confidence: Optional[float] = None
+
+        # Min-heap com os frames mais suspeitos (confiança, desempate, análise)
+        self._top_frames: List = []
+        self._tiebreak = itertools.count()
+        self._frames: List[Dict] = []
+
+    def add(self, frame_analysis: Dict):
+        """Incorpora a análise de um frame às estatísticas acumuladas"""
+        confidence = float(frame_analysis.get('confidence', 0.0))
+
+        self.count += 1
+        # Média incremental, sem guardar o histórico de confianças
+        self.mean_confidence += (confidence - self.mean_confidence) / self.count
+        self.max_confidence = max(self.max_confidence, confidence)
+        self.min_confidence = confidence if self.min_confidence is None else min(self.min_confidence, confidence)
+
+        if frame_analysis.get('is_deepfake'):
+            self.deepfake_frames += 1
+        if frame_analysis.get('faces_detected', 0) > 0:
+            self.frames_with_faces += 1
+        if frame_analysis.get('deduplicated'):
+            # Veredito copiado de outro frame: nenhum estágio da cascata foi executado
+            self.deduplicated_frames += 1
+        else:
+            stage = frame_analysis.get('verdict_stage')
+            if stage:
+                self.verdict_stages[stage] = self.verdict_stages.get(stage, 0) + 1
+
+        if self.top_k:
+            entry = (confidence, -next(self._tiebreak), frame_analysis)
+            if len(self._top_frames) < self.top_k:
+                heapq.heappush(self._top_frames, entry)
+            elif confidence > self._top_frames[0][0]:
+                heapq.heapreplace(self._top_frames, entry)
+
+        if self.keep_frames:
+            self._frames.append(frame_analysis)
+
+    @property
+    def deepfake_percentage(self) -> float:
+        """Percentual de frames classificados como deepfake"""
+        if not self.count:
+            return 0.0
+        return (self.deepfake_frames / self.count) * 100
+
+    @property
+    def is_deepfake(self) -> bool:
+        """Veredito geral baseado na confiança média"""
+        return self.count > 0 and self.mean_confidence > self.confidence_threshold
+
+    @property
+    def frame_analyses(self) -> List[Dict]:
+        """Análises completas dos frames (vazio quando keep_frames=False)"""
+        return self._frames
+
+    def top_frames(self) -> List[Dict]:
+        """Frames mais suspeitos, em ordem decrescente de confiança"""
+        return [entry[2] for entry in sorted(self._top_frames, key=lambda e: (e[0], e[1]), reverse=True)]
+
+    def summary(self) -> Dict:
+        """Resumo compacto das estatísticas acumuladas"""
+        return {
+            "frames": self.count,
+            "frames_with_faces": self.frames_with_faces,
+            "deepfake_frames": self.deepfake_frames,
+            "deduplicated_frames": self.deduplicated_frames,
+            "mean_confidence": self.mean_confidence,
+            "max_confidence": self.max_confidence,
+            "min_confidence": self.min_confidence if self.min_confidence is not None else 0.0,
+            "top_frames": self.top_frames()
+        }
@@ -20,17 +20,52 @@ class Config:
     MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'ml_models')
     DEFAULT_MODEL = 'deepfake_detector_v1.h5'
     CONFIDENCE_THRESHOLD = 0.7
+    MODEL_MAX_ON_DEMAND = int(os.environ.get('MODEL_MAX_ON_DEMAND', 2))  # versões extras carregadas por ?model= (0 = só as já carregadas)
+    
+    # Cascata: modelo de triagem leve antes do modelo completo
+    CASCADE_ENABLED = os.environ.get('CASCADE_ENABLED', 'false').lower() == 'true'
+    SCREENER_MODEL = 'deepfake_screener_v1.h5'
+    SCREENER_IMAGE_SIZE = (112, 112)
+    CASCADE_UNCERTAINTY_BAND = 0.2  # distância ao limiar que exige o modelo completo
     
     # Configurações de processamento
     MAX_FRAMES_PER_VIDEO = 100
     FRAME_EXTRACTION_INTERVAL = 1  # segundos
     IMAGE_SIZE = (224, 224)  # tamanho padrão para o modelo
+    DECODE_MIN_SIDE = 720  # menor lado mínimo ao decodificar imagens grandes em resolução reduzida
+    VIDEO_SUMMARY_ONLY = os.environ.get('VIDEO_SUMMARY_ONLY', 'false').lower() == 'true'
+    VIDEO_SUMMARY_TOP_K = 10  # frames mais suspeitos mantidos no resumo
+    VIDEO_PARALLEL_ENABLED = os.environ.get('VIDEO_PARALLEL_ENABLED', 'false').lower() == 'true'
+    VIDEO_PARALLEL_WORKERS = int(os.environ.get('VIDEO_PARALLEL_WORKERS', 0))  # 0 = número de CPUs
+    VIDEO_PARALLEL_MIN_FRAMES = 20  # abaixo disso a análise sequencial é mais rápida
+    FRAME_DEDUP_ENABLED = os.environ.get('FRAME_DEDUP_ENABLED', 'true').lower() == 'true'
+    FRAME_DEDUP_MAX_DISTANCE = 3  # bits de dHash para considerar frames quase idênticos
+    FRAME_DEDUP_OVERSAMPLE = 2  # candidatos intermediários por intervalo de amostragem
+    FRAME_DEDUP_BLOCK_FRAMES = 10  # frames da grade por bloco; o deduplicador é reiniciado a cada bloco
     
     # Configurações de cache
     CACHE_TIMEOUT = 3600  # 1 hora
+    # Desativado por padrão: reaproveitar vereditos exige validar o raio contra trocas de rosto
+    PERCEPTUAL_CACHE_ENABLED = os.environ.get('PERCEPTUAL_CACHE_ENABLED', 'false').lower() == 'true'
+    PERCEPTUAL_HASH_MAX_DISTANCE = 2  # bits de diferença tolerados por dHash de 64 bits (imagem ou face)
+    PERCEPTUAL_VIDEO_SAMPLES = 4  # frames amostrados para o hash de vídeo
+    PERCEPTUAL_CACHE_MAX_ENTRIES = 10000
+    
+    # Histórico de análises (SQLite)
+    HISTORY_ENABLED = os.environ.get('HISTORY_ENABLED', 'true').lower() == 'true'
+    HISTORY_DB_PATH = os.environ.get('HISTORY_DB_PATH') or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'history.db'
+    )
+    HISTORY_QUEUE_SIZE = 10000  # análises pendentes antes de descartar
+    HISTORY_BATCH_SIZE = 500  # análises por transação
+    HISTORY_FLUSH_INTERVAL = 0.5  # segundos
+    HISTORY_MAX_PAGE_SIZE = 200
     
     # Configurações de logging
     LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+    LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 0.1))  # fração mantida dos logs INFO de alto volume
+    LOG_MAX_MESSAGE_LENGTH = 2000  # caracteres por mensagem de log
+    LOG_QUEUE_SIZE = 10000  # registros pendentes antes de descartar
     LOG_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'logs', 'app.log')
     
     # Configurações de segurança
@@ -44,6 +79,19 @@ class Config:
     # Configurações de performance
     THREAD_POOL_SIZE = 4
     MAX_CONCURRENT_REQUESTS = 10
+    ASGI_MAX_WORKERS = int(os.environ.get('ASGI_MAX_WORKERS', THREAD_POOL_SIZE))  # análises simultâneas no modo ASGI
+    ASGI_LIGHT_WORKERS = int(os.environ.get('ASGI_LIGHT_WORKERS', 4))  # demais rotas (saúde, histórico, estatísticas)
+    ASGI_ANALYSIS_PATHS = ('/api/detection/image', '/api/detection/video', '/api/detection/batch')
+    ASGI_SPOOL_SIZE = 1024 * 1024  # uploads acima disso são recebidos em disco
+    BULK_BATCH_SIZE = 16  # imagens por inferência na análise em massa
+    
+    # Threads do TensorFlow e do OpenCV (None = padrão da biblioteca ou autotune)
+    TF_INTRA_OP_THREADS = int(os.environ['TF_INTRA_OP_THREADS']) if os.environ.get('TF_INTRA_OP_THREADS') else None
+    TF_INTER_OP_THREADS = int(os.environ['TF_INTER_OP_THREADS']) if os.environ.get('TF_INTER_OP_THREADS') else None
+    OPENCV_THREADS = int(os.environ['OPENCV_THREADS']) if os.environ.get('OPENCV_THREADS') else None
+    THREAD_TUNING_FILE = os.environ.get('THREAD_TUNING_FILE') or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'thread_tuning.json'
+    )
     
     @staticmethod
     def init_app(app):
@@ -57,6 +105,7 @@ class Config:
         if not app.debug:
             import logging
             from logging.handlers import RotatingFileHandler
+            from .logging_config import JsonFormatter, add_log_handler
             
             if not os.path.exists('logs'):
                 os.mkdir('logs')
@@ -66,11 +115,10 @@ class Config:
                 maxBytes=10240000, 
                 backupCount=10
             )
-            file_handler.setFormatter(logging.Formatter(
-                '%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]'
-            ))
+            file_handler.setFormatter(JsonFormatter())
             file_handler.setLevel(logging.INFO)
-            app.logger.addHandler(file_handler)
+            # Escrita em disco feita pela thread do listener, fora da requisição
+            add_log_handler(file_handler)
             
             app.logger.setLevel(logging.INFO)
             app.logger.info('Sistema de Detecção de Deepfake iniciado')
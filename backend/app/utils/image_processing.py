@@ -0,0 +1,65 @@
+import cv2
+import numpy as np
+from PIL import Image
+from typing import Optional, Tuple
+
+# Fatores de redução suportados pelo decodificador do OpenCV (DCT no JPEG)
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8
+}
+
+
+def read_image_size(image_path: str) -> Optional[Tuple[int, int]]:
+    """Dimensões (largura, altura) lidas apenas do cabeçalho do arquivo"""
+    try:
+        with Image.open(image_path) as image:
+            return image.size
+    except Exception:
+        return None
+
+
+def choose_reduction(width: int, height: int, min_side: int) -> int:
+    """Maior fator de redução que mantém o menor lado com pelo menos min_side pixels"""
+    reduction = 1
+    for factor in sorted(REDUCED_DECODE_FLAGS):
+        if min(width, height) // factor >= min_side:
+            reduction = factor
+    return reduction
+
+
+def decode_image(image_path: str, min_side: int) -> Tuple[Optional[np.ndarray], int]:
+    """Decodifica a imagem na menor resolução suficiente para detectar faces
+    
+    Para JPEG, IMREAD_REDUCED_COLOR_N decodifica direto no domínio DCT, sem
+    passar pela resolução completa. Retorna a imagem e o fator de redução.
+    """
+    size = read_image_size(image_path)
+    reduction = choose_reduction(*size, min_side) if size else 1
+    image = cv2.imread(image_path, REDUCED_DECODE_FLAGS[reduction])
+    return image, reduction
+
+
+def preprocess_frame(image: np.ndarray, image_size: Tuple[int, int],
+                     out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Converte para RGB, redimensiona e normaliza uma imagem BGR
+    
+    Com out, o resultado float32 é escrito diretamente no array informado
+    (por exemplo, um slot de memória compartilhada) em vez de ser alocado.
+    """
+    # Converter para RGB se necessário
+    if len(image.shape) == 3 and image.shape[2] == 3:
+        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    else:
+        image_rgb = image
+    
+    # Redimensionar
+    image_resized = cv2.resize(image_rgb, image_size)
+    
+    # Normalizar
+    if out is None:
+        return image_resized.astype(np.float32) / 255.0
+    np.multiply(image_resized, np.float32(1.0 / 255.0), out=out, casting='unsafe')
+    return out
@@ -0,0 +1,150 @@
+import json
+import queue
+import atexit
+import random
+import logging
+import reprlib
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from collections.abc import Mapping
+from typing import List, Optional
+
+from .config import Config
+
+_listener: Optional[QueueListener] = None
+_handlers: List[logging.Handler] = []
+_lock = threading.Lock()
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler que não formata a mensagem na thread da requisição
+
+    O QueueHandler padrão chama format() antes de enfileirar; aqui o registro
+    segue intacto (msg + args) e é formatado apenas pela thread do listener.
+    Os filtros (amostragem) rodam antes, então registros descartados não
+    custam nada além da checagem.
+    """
+
+    dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Sob pico de carga, descarta em vez de bloquear a requisição
+            DeferredQueueHandler.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    """Mantém só uma fração dos registros INFO marcados com extra={'sampled': True}"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.INFO or not getattr(record, 'sampled', False):
+            return True
+        return self.rate >= 1.0 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Formata registros como uma linha JSON, com mensagem de tamanho limitado"""
+
+    def __init__(self, max_length: int = None):
+        super().__init__()
+        self.max_length = max_length or Config.LOG_MAX_MESSAGE_LENGTH
+        # Representação resumida de dicts/listas grandes (ex.: frame_analyses)
+        self._repr = reprlib.Repr()
+        self._repr.maxlevel = 3
+        self._repr.maxdict = 20
+        self._repr.maxlist = 5
+        self._repr.maxstring = 200
+        self._repr.maxother = 200
+
+    def _abbreviate(self, value):
+        return self._repr.repr(value) if isinstance(value, (dict, list, tuple, set)) else value
+
+    def _message(self, record) -> str:
+        if not record.args:
+            message = str(record.msg)
+        else:
+            if isinstance(record.args, Mapping) and '%(' in str(record.msg):
+                # logger.info("%(chave)s", {...}): o logging guarda o próprio dict em args
+                args = {key: self._abbreviate(value) for key, value in record.args.items()}
+            else:
+                args = record.args if isinstance(record.args, tuple) else (record.args,)
+                args = tuple(self._abbreviate(arg) for arg in args)
+            try:
+                message = str(record.msg) % args
+            except (TypeError, ValueError):
+                message = f"{record.msg} {args}"
+        if len(message) > self.max_length:
+            message = message[:self.max_length] + '…'
+        return message
+
+    def format(self, record):
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": self._message(record),
+            "thread": record.threadName
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)[-self.max_length:]
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level=None) -> QueueListener:
+    """Direciona o logging raiz para uma fila consumida por uma thread em segundo plano"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        log_queue = queue.Queue(maxsize=Config.LOG_QUEUE_SIZE)
+        queue_handler = DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(SamplingFilter(Config.LOG_SAMPLE_RATE))
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(level or Config.LOG_LEVEL)
+
+        console = logging.StreamHandler()
+        console.setFormatter(JsonFormatter())
+        _handlers.append(console)
+
+        _listener = QueueListener(log_queue, *_handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        return _listener
+
+
+def add_log_handler(handler: logging.Handler):
+    """Adiciona um handler de saída, executado pela thread do listener"""
+    global _listener
+    with _lock:
+        if _listener is None:
+            logging.getLogger().addHandler(handler)
+            return
+        _handlers.append(handler)
+        # Os handlers do QueueListener são fixos: reinicia com a nova lista
+        _listener.stop()
+        _listener = QueueListener(_listener.queue, *_handlers, respect_handler_level=True)
+        _listener.start()
+
+
+def stop_logging():
+    """Esvazia a fila e encerra a thread do listener"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
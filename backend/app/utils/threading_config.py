@@ -0,0 +1,85 @@
+import os
+import json
+import logging
+import threading
+from typing import Dict, Optional
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+_applied: Optional[Dict] = None
+_apply_lock = threading.Lock()
+
+
+def load_tuning(path: str = None) -> Dict:
+    """Lê a configuração gerada pelo autotune (vazia se não existir)"""
+    path = path or Config.THREAD_TUNING_FILE
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Arquivo de tuning inválido ({path}): {e}")
+        return {}
+
+
+def resolve_thread_settings() -> Dict:
+    """Combina o resultado do autotune com valores definidos explicitamente no Config
+
+    Valores explícitos (variáveis de ambiente) têm prioridade; None mantém o
+    padrão da biblioteca.
+    """
+    settings = {
+        "tf_intra_op_threads": None,
+        "tf_inter_op_threads": None,
+        "opencv_threads": None,
+        "workers": None,
+        "batch_size": None
+    }
+    settings.update({k: v for k, v in load_tuning().items() if k in settings})
+
+    explicit = {
+        "tf_intra_op_threads": Config.TF_INTRA_OP_THREADS,
+        "tf_inter_op_threads": Config.TF_INTER_OP_THREADS,
+        "opencv_threads": Config.OPENCV_THREADS
+    }
+    settings.update({k: v for k, v in explicit.items() if v is not None})
+    return settings
+
+
+def apply_thread_settings(settings: Dict = None) -> Dict:
+    """Configura os pools de threads do TensorFlow e do OpenCV neste processo
+
+    Deve ser chamada antes da primeira operação do TensorFlow; chamadas
+    seguintes não têm efeito.
+    """
+    global _applied
+    with _apply_lock:
+        if _applied is not None:
+            return _applied
+
+        settings = settings if settings is not None else resolve_thread_settings()
+
+        import cv2
+        import tensorflow as tf
+
+        try:
+            if settings.get("tf_intra_op_threads") is not None:
+                tf.config.threading.set_intra_op_parallelism_threads(settings["tf_intra_op_threads"])
+            if settings.get("tf_inter_op_threads") is not None:
+                tf.config.threading.set_inter_op_parallelism_threads(settings["tf_inter_op_threads"])
+        except RuntimeError as e:
+            # O TensorFlow já foi inicializado neste processo
+            logger.warning(f"⚠️ Não foi possível configurar threads do TensorFlow: {e}")
+
+        if settings.get("opencv_threads") is not None:
+            cv2.setNumThreads(settings["opencv_threads"])
+
+        _applied = settings
+        logger.info(
+            f"🧵 Threads: TF intra={settings.get('tf_intra_op_threads')} "
+            f"inter={settings.get('tf_inter_op_threads')}, OpenCV={settings.get('opencv_threads')}"
+        )
+        return _applied
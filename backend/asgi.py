@@ -0,0 +1,8 @@
+"""Ponto de entrada ASGI
+
+Uso: uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+from app.asgi import AsgiAdapter
+from main import create_app
+
+app = AsgiAdapter(create_app())
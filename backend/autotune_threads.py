@@ -0,0 +1,195 @@
+"""Autotune da topologia de threads
+
+Mede a vazão (imagens/s) de combinações de processos worker x threads
+intra-op do TensorFlow x tamanho de lote nesta máquina e grava a melhor em
+Config.THREAD_TUNING_FILE. O detector aplica esse arquivo ao iniciar, em
+qualquer processo (servidor, pool de vídeo ou análise em massa).
+
+Uso:
+    python autotune_threads.py [--seconds 5] [--output thread_tuning.json]
+"""
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import argparse
+import itertools
+import threading
+import multiprocessing
+from typing import Dict, List, Optional
+
+from app.utils.config import Config
+
+logger = logging.getLogger('autotune_threads')
+
+# Tempo máximo para os workers carregarem o modelo e, depois da medição,
+# para entregarem o resultado
+LOAD_TIMEOUT = 600
+RESULT_GRACE = 60
+
+
+def _powers_of_two(limit: int) -> List[int]:
+    values = []
+    value = 1
+    while value <= limit:
+        values.append(value)
+        value *= 2
+    if values[-1] != limit:
+        values.append(limit)
+    return values
+
+
+def _benchmark_worker(settings: Dict, batch_size: int, seconds: float, barrier, results):
+    """Processo de medição: aplica as threads, carrega o detector e roda inferências"""
+    try:
+        import numpy as np
+        from app.utils.threading_config import apply_thread_settings
+        apply_thread_settings(settings)
+
+        from app.services.deepfake_detector import DeepfakeDetector
+        detector = DeepfakeDetector()
+        handle = detector.registry.get_handle()
+        if handle is None or handle.model is None:
+            raise RuntimeError("Modelo padrão não carregado")
+
+        # Frames em resolução de vídeo, para que o pré-processamento (OpenCV) também conte
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(batch_size)]
+
+        def step():
+            batch = np.concatenate([detector.preprocess_image(frame) for frame in frames])
+            detector._predict_batch(batch, handle)
+
+        # Aquecimento fora da medição
+        step()
+        barrier.wait()
+
+        processed = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            step()
+            processed += batch_size
+        results.put(processed)
+    except Exception:
+        # Libera o processo principal em vez de deixá-lo esperando até o timeout
+        barrier.abort()
+        results.put(None)
+        raise
+
+
+def ensure_model() -> bool:
+    """Cria ou carrega o modelo padrão uma vez, antes de iniciar os workers
+
+    Sem isso, na primeira execução cada worker criaria e gravaria o mesmo
+    arquivo de modelo ao mesmo tempo.
+    """
+    if os.path.exists(os.path.join(Config.MODEL_PATH, Config.DEFAULT_MODEL)):
+        return True
+    from app.services.deepfake_detector import DeepfakeDetector
+    handle = DeepfakeDetector().registry.get_handle()
+    return handle is not None and handle.model is not None
+
+
+def measure(ctx, workers: int, intra: int, batch_size: int, seconds: float) -> Optional[float]:
+    """Vazão agregada de `workers` processos concorrentes, em imagens/s (None se algum falhar)"""
+    settings = {
+        "tf_intra_op_threads": intra,
+        "tf_inter_op_threads": Config.TF_INTER_OP_THREADS or 1,
+        "opencv_threads": intra
+    }
+    barrier = ctx.Barrier(workers + 1)
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=_benchmark_worker, args=(settings, batch_size, seconds, barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        # Timeouts para não travar se um worker falhar ou morrer
+        barrier.wait(timeout=LOAD_TIMEOUT)
+        start = time.perf_counter()
+        total = 0
+        for _ in processes:
+            processed = results.get(timeout=seconds + RESULT_GRACE)
+            if processed is None:
+                return None
+            total += processed
+        elapsed = time.perf_counter() - start
+        return total / elapsed
+    except (threading.BrokenBarrierError, queue.Empty):
+        return None
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+
+def autotune(seconds: float, max_threads: int, batch_sizes: List[int]) -> Optional[Dict]:
+    ctx = multiprocessing.get_context('spawn')
+    candidates = [
+        (workers, intra, batch_size)
+        for workers, intra, batch_size in itertools.product(
+            _powers_of_two(max_threads), _powers_of_two(max_threads), batch_sizes
+        )
+        # Evita superinscrição: processos x threads não passa do número de CPUs
+        if workers * intra <= max_threads
+    ]
+
+    best = None
+    for workers, intra, batch_size in candidates:
+        throughput = measure(ctx, workers, intra, batch_size, seconds)
+        if throughput is None:
+            logger.warning(f"⚠️ workers={workers} intra={intra} batch={batch_size}: medição falhou, ignorando")
+            continue
+        logger.info(f"workers={workers:<3} intra={intra:<3} batch={batch_size:<3} -> {throughput:8.1f} imagens/s")
+        if best is None or throughput > best["images_per_second"]:
+            best = {
+                "workers": workers,
+                "tf_intra_op_threads": intra,
+                "tf_inter_op_threads": Config.TF_INTER_OP_THREADS or 1,
+                "opencv_threads": intra,
+                "batch_size": batch_size,
+                "images_per_second": throughput
+            }
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Autotune de threads do TensorFlow/OpenCV",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument('--seconds', type=float, default=5.0, help="Duração de cada medição")
+    parser.add_argument('--max-threads', type=int, default=os.cpu_count() or 1,
+                        help="Total de threads disponíveis (padrão: número de CPUs)")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 16, 32])
+    parser.add_argument('--output', default=Config.THREAD_TUNING_FILE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if not ensure_model():
+        logger.error("❌ Modelo padrão indisponível, nada a medir")
+        return 1
+
+    best = autotune(args.seconds, args.max_threads, args.batch_sizes)
+    if best is None:
+        logger.error("❌ Nenhuma configuração pôde ser medida")
+        return 1
+    best["cpu_count"] = os.cpu_count()
+    best["created_at"] = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(best, f, indent=2)
+    logger.info(f"✅ Melhor configuração gravada em {args.output}: {best}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""Benchmark: transporte de frames entre processos
+
+Compara o caminho real decode_video_to_ring -> iter_batches (ring buffer em
+memória compartilhada) com uma multiprocessing.Queue que serializa (pickle)
+cada frame. Nos dois casos o produtor decodifica o vídeo e escreve a saída
+completa de preprocess_frame, e o consumidor copia cada frame para o lote:
+a diferença medida é só o transporte.
+
+Uso:
+    python benchmarks/shared_memory_transport.py [--video arquivo.mp4] [--frames 2000]
+                                                 [--slots 32] [--batch-size 16]
+
+Sem --video, um vídeo sintético (1280x720 por padrão) é gerado em um
+diretório temporário. Quanto menor a resolução de origem, maior a fração do
+tempo gasta no transporte.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.shared_frames import SharedFrameRing, decode_video_to_ring, iter_batches  # noqa: E402
+from app.utils.config import Config  # noqa: E402
+from app.utils.image_processing import preprocess_frame  # noqa: E402
+
+
+def make_video(path: str, frames: int, width: int = 1280, height: int = 720):
+    """Gera um vídeo sintético com conteúdo diferente em cada frame"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (width, height))
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    for i in range(frames):
+        writer.write(np.roll(base, i * 8, axis=1))
+    writer.release()
+
+
+def pickled_producer(q, video_path: str, frame_numbers, image_size):
+    """Mesmo trabalho de decode_video_to_ring, enviando cada frame pela fila"""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_numbers[0])
+        for position in frame_numbers:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            # Um array por frame: a Queue serializa em outra thread, depois do put()
+            q.put((position, preprocess_frame(frame, image_size)))
+    finally:
+        cap.release()
+        q.put(None)
+
+
+def run_pickled(ctx, video_path: str, frame_numbers, image_size, slots: int, batch_size: int):
+    q = ctx.Queue(maxsize=slots)
+    producer = ctx.Process(target=pickled_producer, args=(q, video_path, frame_numbers, image_size))
+    batch = np.empty((batch_size, *image_size[::-1], 3), dtype=np.float32)
+    start = time.perf_counter()
+    producer.start()
+
+    frames = 0
+    checksum = 0.0
+    filled = 0
+    while True:
+        item = q.get()
+        if item is not None:
+            batch[filled] = item[1]
+            filled += 1
+        if filled and (item is None or filled == batch_size):
+            checksum += float(batch[:filled, 0, 0, 0].sum())
+            frames += filled
+            filled = 0
+        if item is None:
+            break
+
+    elapsed = time.perf_counter() - start
+    producer.join()
+    return elapsed, frames, checksum
+
+
+def run_shared(ctx, video_path: str, frame_numbers, image_size, slots: int, batch_size: int):
+    with SharedFrameRing(slots, (*image_size[::-1], 3), ctx=ctx) as ring:
+        producer = ctx.Process(target=decode_video_to_ring,
+                               args=(ring.spec(), video_path, frame_numbers, image_size))
+        start = time.perf_counter()
+        producer.start()
+
+        frames = 0
+        checksum = 0.0
+        for batch, metadata in iter_batches(ring, batch_size, timeout=60):
+            checksum += float(batch[:, 0, 0, 0].sum())
+            frames += len(metadata)
+
+        elapsed = time.perf_counter() - start
+        producer.join()
+    return elapsed, frames, checksum
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--video', help="Vídeo a decodificar (padrão: vídeo sintético)")
+    parser.add_argument('--frames', type=int, default=2000)
+    parser.add_argument('--slots', type=int, default=32)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--width', type=int, default=1280, help="Largura do vídeo sintético")
+    parser.add_argument('--height', type=int, default=720, help="Altura do vídeo sintético")
+    args = parser.parse_args()
+
+    tmpdir = None
+    video_path = args.video
+    if video_path is None:
+        tmpdir = tempfile.mkdtemp()
+        video_path = os.path.join(tmpdir, 'synthetic.avi')
+        make_video(video_path, args.frames, args.width, args.height)
+
+    try:
+        cap = cv2.VideoCapture(video_path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        frame_numbers = list(range(min(args.frames, total)))
+
+        ctx = multiprocessing.get_context('spawn')
+        image_size = Config.IMAGE_SIZE
+        frame_mb = image_size[0] * image_size[1] * 3 * 4 / 1e6
+
+        print(f"{len(frame_numbers)} frames de {video_path} -> float32 {image_size} "
+              f"({frame_mb:.2f} MB cada), {args.slots} slots, lotes de {args.batch_size}")
+        results = {}
+        for name, runner in (("fila com pickle", run_pickled), ("memória compartilhada", run_shared)):
+            elapsed, frames, checksum = runner(ctx, video_path, frame_numbers, image_size,
+                                               args.slots, args.batch_size)
+            results[name] = checksum
+            print(f"{name:>22}: {elapsed:7.3f} s  {frames / elapsed:9.1f} frames/s  "
+                  f"{frames * frame_mb / elapsed:8.1f} MB/s")
+
+        # Tolerância: preprocess_frame com out multiplica por 1/255 em vez de dividir
+        checksums = list(results.values())
+        if not np.isclose(checksums[0], checksums[1], rtol=1e-5):
+            print("⚠️ Checksums divergentes entre os transportes")
+    finally:
+        if tmpdir:
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""Análise offline em massa
+
+Percorre um diretório (ou um manifesto com um caminho por linha) e analisa os
+arquivos em paralelo com o DeepfakeDetector, gravando um resultado JSON por
+linha. A própria saída serve de checkpoint: ao reexecutar com o mesmo
+arquivo de saída, os arquivos já presentes nela são ignorados.
+
+Uso:
+    python bulk_analyze.py /dados/arquivo -o resultados.jsonl --workers 8
+    python bulk_analyze.py --manifest lista.txt -o resultados.jsonl
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Set, Tuple
+
+from app.utils.config import Config
+from app.utils.threading_config import load_tuning
+
+logger = logging.getLogger('bulk_analyze')
+
+# Detector próprio de cada processo worker (criado no initializer)
+_detector = None
+
+
+def _init_worker(log_level: str):
+    global _detector
+    logging.basicConfig(level=log_level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    from app.services.deepfake_detector import DeepfakeDetector
+    _detector = DeepfakeDetector()
+
+
+def _analyze_images(paths: List[str]) -> List[Dict]:
+    """Analisa um lote de imagens com uma única inferência"""
+    results = _detector.analyze_images(paths)
+    return [_record(path, 'image', result) for path, result in zip(paths, results)]
+
+
+def _analyze_video(path: str, frame_analyses: bool) -> List[Dict]:
+    # Sem o pool de segmentos: o paralelismo já vem dos workers desta ferramenta
+    result = _detector.analyze_video(path, summary_only=not frame_analyses, parallel=False)
+    return [_record(path, 'video', result)]
+
+
+def _record(path: str, media_type: str, result: Dict) -> Dict:
+    record = {"path": path, "type": media_type}
+    record.update(result)
+    return record
+
+
+def media_type(path: str):
+    """Tipo de mídia pela extensão, ou None se não suportada"""
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    for file_type, extensions in Config.ALLOWED_EXTENSIONS.items():
+        if extension in extensions:
+            return file_type
+    return None
+
+
+def iter_inputs(root: str = None, manifest: str = None) -> Iterator[str]:
+    """Caminhos a analisar, em ordem estável"""
+    if manifest:
+        with open(manifest, encoding='utf-8') as f:
+            for line in f:
+                path = line.strip()
+                if path and not path.startswith('#'):
+                    yield os.path.abspath(path)
+        return
+
+    for directory, subdirs, files in os.walk(root):
+        subdirs.sort()
+        for name in sorted(files):
+            yield os.path.abspath(os.path.join(directory, name))
+
+
+def load_done(output: str) -> Set[str]:
+    """Caminhos já presentes na saída; descarta uma última linha incompleta"""
+    done = set()
+    if not os.path.exists(output):
+        return done
+
+    valid_size = 0
+    with open(output, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                # Linha truncada por uma execução interrompida
+                break
+            try:
+                done.add(json.loads(line)["path"])
+            except (ValueError, KeyError):
+                break
+            valid_size += len(line)
+
+    if valid_size < os.path.getsize(output):
+        logger.warning("Descartando registro incompleto no fim da saída")
+        with open(output, 'r+b') as f:
+            f.truncate(valid_size)
+    return done
+
+
+def iter_tasks(paths: Iterator[str], done: Set[str], batch_size: int,
+               stats: Dict) -> Iterator[Tuple[str, object]]:
+    """Agrupa imagens em lotes; vídeos são tarefas individuais"""
+    batch = []
+    for path in paths:
+        if path in done:
+            stats["skipped"] += 1
+            continue
+        file_type = media_type(path)
+        if file_type == 'image':
+            batch.append(path)
+            if len(batch) == batch_size:
+                yield 'image', batch
+                batch = []
+        elif file_type == 'video':
+            yield 'video', path
+        else:
+            stats["unsupported"] += 1
+    if batch:
+        yield 'image', batch
+
+
+def run(args) -> Dict:
+    done = load_done(args.output)
+    stats = {"analyzed": 0, "errors": 0, "skipped": 0, "unsupported": 0}
+    if done:
+        logger.info(f"Retomando: {len(done)} arquivos já analisados")
+
+    tasks = iter_tasks(iter_inputs(args.input, args.manifest), done, args.batch_size, stats)
+    start = time.time()
+
+    # 'spawn' evita herdar o estado do TensorFlow do processo pai
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(args.log_level,)) as executor, \
+            open(args.output, 'a', encoding='utf-8') as out:
+        pending = set()
+        exhausted = False
+
+        while pending or not exhausted:
+            # Mantém um número limitado de tarefas em voo
+            while not exhausted and len(pending) < args.workers * 2:
+                task = next(tasks, None)
+                if task is None:
+                    exhausted = True
+                    break
+                kind, payload = task
+                if kind == 'image':
+                    pending.add(executor.submit(_analyze_images, payload))
+                else:
+                    pending.add(executor.submit(_analyze_video, payload, args.frame_analyses))
+
+            if not pending:
+                break
+
+            completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in completed:
+                try:
+                    records = future.result()
+                except Exception as e:
+                    logger.error(f"Erro em uma tarefa: {e}")
+                    stats["errors"] += 1
+                    continue
+                for record in records:
+                    out.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+                    stats["errors" if "error" in record else "analyzed"] += 1
+
+            # Checkpoint: tudo o que foi escrito sobrevive a uma interrupção
+            out.flush()
+            os.fsync(out.fileno())
+
+            elapsed = max(time.time() - start, 1e-6)
+            logger.info(f"{stats['analyzed']} analisados, {stats['errors']} erros "
+                        f"({stats['analyzed'] / elapsed:.1f} arquivos/s)")
+
+    return stats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Análise offline em massa de imagens e vídeos",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('input', nargs='?', help="Diretório a percorrer recursivamente")
+    source.add_argument('--manifest', help="Arquivo com um caminho por linha")
+    parser.add_argument('-o', '--output', required=True, help="Arquivo JSONL de saída (também usado para retomar)")
+    tuning = load_tuning()
+    parser.add_argument('-w', '--workers', type=int, default=tuning.get('workers') or os.cpu_count() or 1,
+                        help="Processos de análise (padrão: autotune ou número de CPUs)")
+    parser.add_argument('-b', '--batch-size', type=int, default=tuning.get('batch_size') or Config.BULK_BATCH_SIZE,
+                        help="Imagens por chamada de inferência")
+    parser.add_argument('--frame-analyses', action='store_true',
+                        help="Inclui a análise de cada frame dos vídeos (padrão: apenas o resumo)")
+    parser.add_argument('--log-level', default=Config.LOG_LEVEL)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    if args.input and not os.path.isdir(args.input):
+        logger.error(f"Diretório não encontrado: {args.input}")
+        return 1
+
+    stats = run(args)
+    logger.info(f"✅ Concluído: {stats}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,12 +9,10 @@ from app.routes.detection_routes import detection_bp
 from app.routes.health_routes import health_bp
 from app.services.deepfake_detector import DeepfakeDetector
 from app.utils.config import Config
+from app.utils.logging_config import setup_logging
 
-# Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configurar logging (fila + thread em segundo plano)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 def create_app():
@@ -23,6 +21,7 @@ def create_app():
     
     # Configurações
     app.config.from_object(Config)
+    Config.init_app(app)
     
     # Habilitar CORS
     CORS(app, resources={
@@ -40,11 +39,12 @@ def create_app():
     # Middleware para logging
     @app.before_request
     def log_request():
-        logger.info(f"Request: {request.method} {request.path} from {request.remote_addr}")
+        logger.info("Request: %s %s from %s", request.method, request.path, request.remote_addr,
+                    extra={'sampled': True})
     
     @app.after_request
     def log_response(response):
-        logger.info(f"Response: {response.status_code}")
+        logger.info("Response: %s", response.status_code, extra={'sampled': True})
         return response
     
     # Rota raiz